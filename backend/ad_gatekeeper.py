@@ -4,32 +4,88 @@ HLS Ad Gatekeeper for Twitch streams.
 Filters out streams containing ad markers before sending to clipper.
 """
 
-import re
 import subprocess
 import time
-import urllib.request
-import urllib.error
-from typing import Optional
-from backend.logging_utils import setup_logger
+from typing import Dict, Optional, Tuple, Union
 
-logger = setup_logger(__name__)
+import requests
+from requests.adapters import HTTPAdapter
 
-# Regex pattern to detect ad markers in m3u8 playlists
-AD_RE = re.compile(r"(twitch-stitched-ad|twitch-ad-quartile|EXT-X-DISCONTINUITY)", re.IGNORECASE)
+from backend.logging_utils import DedupFilter, setup_logger
+
+logger = setup_logger(__name__, use_queue=True)
+# Retry loops repeat the same warning once per attempt; collapse runs of them.
+# Attempts are at least check_interval_sec apart, so the window spans several.
+logger.addFilter(DedupFilter(window_sec=30.0))
+
+# Ad markers in m3u8 playlists (lowercase bytes; matched case-insensitively)
+AD_MARKERS = (b"twitch-stitched-ad", b"twitch-ad-quartile", b"ext-x-discontinuity")
 
 class AdGatekeeper:
     """HLS Ad Gatekeeper for filtering clean Twitch streams."""
 
-    def __init__(self, check_interval_sec: int = 2, max_retries: int = 30):
+    def __init__(self, check_interval_sec: int = 2, max_retries: int = 30,
+                 backoff_multiplier: float = 1.5, max_interval_sec: float = 10,
+                 url_ttl_sec: float = 120):
         """
         Initialize the Ad Gatekeeper.
 
         Args:
             check_interval_sec: Seconds to wait between checks
             max_retries: Maximum number of retries before giving up
+            backoff_multiplier: Factor applied to the wait after each consecutive failure
+            max_interval_sec: Upper bound for the wait between checks
+            url_ttl_sec: Seconds a resolved stream URL is reused before re-running streamlink
         """
         self.check_interval_sec = check_interval_sec
         self.max_retries = max_retries
+        self.backoff_multiplier = backoff_multiplier
+        self.max_interval_sec = max_interval_sec
+        self.url_ttl_sec = url_ttl_sec
+
+        # Resolved stream URLs keyed by (channel, quality) -> (url, resolved_at)
+        self._url_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+        # Persistent HTTP session so playlist polls reuse the TCP/TLS connection
+        self._session = requests.Session()
+        self._session.headers.update({
+            "User-Agent": "cliplive-ad-gatekeeper/1.0",
+            "Accept-Encoding": "gzip",
+        })
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=0,  # get_clean_twitch_url's loop owns retries and backoff
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # Validators and body of the last fetched playlist for conditional GETs
+        self._cached_url: Optional[str] = None
+        self._cached_etag: Optional[str] = None
+        self._cached_last_modified: Optional[str] = None
+        self._cached_body: Optional[bytes] = None
+
+        # Verdict for the last body scanned by has_ads (reused on 304 hits)
+        self._scanned_body: Optional[bytes] = None
+        self._scanned_verdict = True
+
+    def close(self):
+        """Close the underlying HTTP session."""
+        self._session.close()
+
+    def _backoff_interval(self, consecutive_failures: int) -> float:
+        """Seconds to wait after the given number of consecutive failed checks."""
+        exponent = max(0, consecutive_failures - 1)
+        interval = self.check_interval_sec * (self.backoff_multiplier ** exponent)
+        return min(self.max_interval_sec, interval)
+
+    @staticmethod
+    def _sleep_until(deadline: float):
+        """Sleep until the given time.monotonic() deadline (no-op if already past)."""
+        sleep_for = deadline - time.monotonic()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
 
     def streamlink_url(self, channel: str, quality: str = "best") -> Optional[str]:
         """Get stream URL from streamlink."""
@@ -60,20 +116,77 @@ class AdGatekeeper:
         except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
             return None
 
-    def fetch_playlist(self, url: str) -> Optional[str]:
-        """Fetch m3u8 playlist content from URL."""
+    def _cached_streamlink_url(self, channel: str, quality: str = "best") -> Optional[str]:
+        """streamlink_url, reusing the last resolved URL for up to url_ttl_sec."""
+        key = (channel, quality)
+        cached = self._url_cache.get(key)
+        if cached and time.monotonic() - cached[1] < self.url_ttl_sec:
+            return cached[0]
+
+        url = self.streamlink_url(channel, quality)
+        if url:
+            self._url_cache[key] = (url, time.monotonic())
+        else:
+            self._url_cache.pop(key, None)
+        return url
+
+    def _invalidate_url(self, channel: str, quality: str = "best"):
+        """Drop the cached URL so the next lookup runs streamlink again."""
+        self._url_cache.pop((channel, quality), None)
+
+    def fetch_playlist_bytes(self, url: str) -> Optional[bytes]:
+        """Fetch raw m3u8 playlist bytes from URL."""
+        headers = {}
+        if url == self._cached_url:
+            if self._cached_etag:
+                headers["If-None-Match"] = self._cached_etag
+            if self._cached_last_modified:
+                headers["If-Modified-Since"] = self._cached_last_modified
+
         try:
-            with urllib.request.urlopen(url, timeout=10) as response:
-                return response.read().decode("utf-8", "ignore")
-        except (urllib.error.URLError, urllib.error.HTTPError, Exception):
+            response = self._session.get(url, headers=headers, timeout=10)
+            if response.status_code == 304 and self._cached_body is not None:
+                return self._cached_body
+            response.raise_for_status()
+
+            self._cached_url = url
+            self._cached_etag = response.headers.get("ETag")
+            self._cached_last_modified = response.headers.get("Last-Modified")
+            self._cached_body = response.content
+            return self._cached_body
+        except (requests.RequestException, Exception):
             return None
 
-    def has_ads(self, m3u8_text: str) -> bool:
-        """Check if m3u8 playlist contains ad markers."""
-        if not m3u8_text:
+    def fetch_playlist(self, url: str) -> Optional[str]:
+        """Fetch m3u8 playlist content from URL as text."""
+        content = self.fetch_playlist_bytes(url)
+        if content is None:
+            return None
+        return content.decode("utf-8", "ignore")
+
+    def has_ads(self, m3u8: Union[bytes, str, None]) -> bool:
+        """Check if m3u8 playlist (raw bytes or text) contains ad markers."""
+        if not m3u8:
             return True  # Treat empty/invalid as "has ads" to be safe
 
-        return bool(AD_RE.search(m3u8_text))
+        if m3u8 is self._scanned_body:
+            return self._scanned_verdict  # Same object as last scan (304 reuse)
+
+        raw = m3u8
+        if isinstance(m3u8, str):
+            m3u8 = m3u8.encode("utf-8", "ignore")
+
+        if not m3u8.lstrip().startswith(b"#EXTM3U"):
+            verdict = True  # Not a playlist at all
+        else:
+            # Playlists are ASCII: lowercase the raw bytes once and run bytes
+            # substring scans, with no UTF-8 decode and no regex engine
+            data = m3u8.lower()
+            verdict = any(marker in data for marker in AD_MARKERS)
+
+        self._scanned_body = raw
+        self._scanned_verdict = verdict
+        return verdict
 
     def get_clean_hls_url(self, channel: str, quality: str = "best") -> Optional[str]:
         """Alias for get_clean_twitch_url for backwards compatibility."""
@@ -90,44 +203,54 @@ class AdGatekeeper:
         Returns:
             Clean HLS URL or None if unable to get clean stream
         """
-        logger.info(f"Ad Gatekeeper: Starting clean URL acquisition for {channel} ({quality})")
+        logger.info("Ad Gatekeeper: Starting clean URL acquisition for %s (%s)", channel, quality)
 
         retries = 0
+        fetch_failures = 0
         while retries < self.max_retries:
+            # Waits are measured from the start of the attempt, not after its work
+            attempt_start = time.monotonic()
             try:
-                # Get stream URL from streamlink
-                url = self.streamlink_url(channel, quality)
+                # Get stream URL from streamlink (cached while it stays fresh)
+                url = self._cached_streamlink_url(channel, quality)
                 if not url:
-                    logger.warning(f"Ad Gatekeeper: No stream URL received (attempt {retries + 1}/{self.max_retries})")
+                    logger.warning("Ad Gatekeeper: No stream URL received (attempt %d/%d)", retries + 1, self.max_retries)
                     retries += 1
-                    time.sleep(self.check_interval_sec)
+                    self._sleep_until(attempt_start + self._backoff_interval(retries))
                     continue
 
                 # Fetch playlist content
-                playlist_content = self.fetch_playlist(url)
+                playlist_content = self.fetch_playlist_bytes(url)
                 if not playlist_content:
-                    logger.warning(f"Ad Gatekeeper: Failed to fetch playlist (attempt {retries + 1}/{self.max_retries})")
+                    logger.warning("Ad Gatekeeper: Failed to fetch playlist (attempt %d/%d)", retries + 1, self.max_retries)
+                    fetch_failures += 1
+                    if fetch_failures >= 2:
+                        # The cached URL has likely expired: resolve a new one
+                        self._invalidate_url(channel, quality)
+                        fetch_failures = 0
                     retries += 1
-                    time.sleep(self.check_interval_sec)
+                    self._sleep_until(attempt_start + self._backoff_interval(retries))
                     continue
 
+                fetch_failures = 0
+
                 # Check for ad markers
                 if self.has_ads(playlist_content):
-                    logger.debug(f"Ad Gatekeeper: Ad markers detected, retrying (attempt {retries + 1}/{self.max_retries})")
+                    logger.debug("Ad Gatekeeper: Ad markers detected, retrying (attempt %d/%d)", retries + 1, self.max_retries)
                     retries += 1
-                    time.sleep(self.check_interval_sec)
+                    self._sleep_until(attempt_start + self._backoff_interval(retries))
                     continue
 
                 # Clean URL found!
-                logger.info(f"Ad Gatekeeper: Clean URL acquired after {retries + 1} attempts")
+                logger.info("Ad Gatekeeper: Clean URL acquired after %d attempts", retries + 1)
                 return url
 
             except Exception as e:
-                logger.error(f"Ad Gatekeeper: Error during attempt {retries + 1}: {e}")
+                logger.error("Ad Gatekeeper: Error during attempt %d: %s", retries + 1, e)
                 retries += 1
-                time.sleep(self.check_interval_sec)
+                self._sleep_until(attempt_start + self._backoff_interval(retries))
 
-        logger.error(f"Ad Gatekeeper: Failed to get clean URL after {self.max_retries} attempts")
+        logger.error("Ad Gatekeeper: Failed to get clean URL after %d attempts", self.max_retries)
         return None
 
     def validate_url_continuously(self, channel: str, quality: str = "best", duration_sec: int = 60) -> bool:
@@ -143,26 +266,30 @@ class AdGatekeeper:
         Returns:
             True if stream remained clean for the duration
         """
-        logger.info(f"Ad Gatekeeper: Starting continuous validation for {duration_sec}s")
+        logger.info("Ad Gatekeeper: Starting continuous validation for %ss", duration_sec)
 
-        start_time = time.time()
+        start_time = time.monotonic()
+        end_time = start_time + duration_sec
         checks = 0
 
-        while (time.time() - start_time) < duration_sec:
-            url = self.streamlink_url(channel, quality)
+        while time.monotonic() < end_time:
+            url = self._cached_streamlink_url(channel, quality)
             if not url:
                 logger.warning("Ad Gatekeeper: Stream unavailable during validation")
                 return False
 
-            playlist_content = self.fetch_playlist(url)
+            playlist_content = self.fetch_playlist_bytes(url)
+            if not playlist_content:
+                self._invalidate_url(channel, quality)
             if not playlist_content or self.has_ads(playlist_content):
                 logger.warning("Ad Gatekeeper: Ads detected during validation")
                 return False
 
             checks += 1
-            time.sleep(self.check_interval_sec)
+            # Check k runs at start + k * interval, so work time does not add drift
+            self._sleep_until(start_time + checks * self.check_interval_sec)
 
-        logger.info(f"Ad Gatekeeper: Stream remained clean for {duration_sec}s ({checks} checks)")
+        logger.info("Ad Gatekeeper: Stream remained clean for %ss (%d checks)", duration_sec, checks)
         return True
 
 def main():
@@ -180,21 +307,24 @@ def main():
 
     gatekeeper = AdGatekeeper()
 
-    # Get clean URL
-    clean_url = gatekeeper.get_clean_twitch_url(channel, quality)
-    if not clean_url:
-        print(f"❌ Failed to get clean URL for {channel}")
-        sys.exit(1)
-
-    print(f"✅ Clean URL: {clean_url}")
-
-    # Optionally validate for stability
-    if duration > 0:
-        is_stable = gatekeeper.validate_url_continuously(channel, quality, duration)
-        if not is_stable:
-            print(f"❌ Stream was not stable during {duration}s validation")
+    try:
+        # Get clean URL
+        clean_url = gatekeeper.get_clean_twitch_url(channel, quality)
+        if not clean_url:
+            print(f"❌ Failed to get clean URL for {channel}")
             sys.exit(1)
-        print(f"✅ Stream validated as stable for {duration}s")
+
+        print(f"✅ Clean URL: {clean_url}")
+
+        # Optionally validate for stability
+        if duration > 0:
+            is_stable = gatekeeper.validate_url_continuously(channel, quality, duration)
+            if not is_stable:
+                print(f"❌ Stream was not stable during {duration}s validation")
+                sys.exit(1)
+            print(f"✅ Stream validated as stable for {duration}s")
+    finally:
+        gatekeeper.close()
 
 if __name__ == "__main__":
     main()
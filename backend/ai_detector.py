@@ -6,37 +6,94 @@ Implements semantic analysis, sentiment detection, and ML fusion.
 
 import os
 import re
+import csv
 import json
+import math
 import time
+import atexit
+import functools
+import threading
 import pickle
 import subprocess
-import tempfile
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
-import pandas as pd
 import numpy as np
 
-# ML and NLP imports
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import nltk
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+# sklearn, joblib and vaderSentiment are imported at first use so that
+# importing this module stays cheap when no detector is ever built
 
 from backend.logging_utils import setup_logger
 
-logger = setup_logger(__name__)
+logger = setup_logger(__name__, use_queue=True)
+
+# Optional in-process audio decoding (avoids an ffmpeg subprocess per segment)
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+# Feature order expected by the fusion model
+MODEL_FEATURES = (
+    'audio_level', 'motion_level', 'scene_change',
+    'sentiment', 'excitement', 'hype_score'
+)
 
 class SpeechExtractor:
-    """Extract speech from audio streams using FFmpeg."""
+    """Extract speech from audio streams using PyAV or FFmpeg."""
     
     def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+        self._whisper_model = None
+        self._whisper_unavailable = False
         logger.debug("Speech extractor initialized")
     
+    def _get_whisper_model(self):
+        """Load the shared Whisper model once; None if Whisper is not installed."""
+        if self._whisper_model is None and not self._whisper_unavailable:
+            try:
+                from whisper_singleton import WhisperSingleton
+                self._whisper_model = WhisperSingleton().get_model()
+            except ImportError:
+                self._whisper_unavailable = True
+                logger.error("CRITICAL: Whisper not installed - cannot process real speech")
+                logger.error("Install with: pip install openai-whisper")
+        return self._whisper_model
+    
+    def _decode_audio_pyav(self, video_path: str) -> Optional[np.ndarray]:
+        """Decode the first audio stream to 16 kHz mono float32 samples in-process."""
+        with av.open(video_path) as container:
+            if not container.streams.audio:
+                return None
+            
+            resampler = av.AudioResampler(format='s16', layout='mono', rate=16000)
+            chunks = []
+            for frame in container.decode(container.streams.audio[0]):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        
+        if not chunks:
+            return None
+        return np.concatenate(chunks).astype(np.float32) / 32768.0
+    
+    def _decode_audio_ffmpeg(self, video_path: str) -> Optional[np.ndarray]:
+        """Decode audio to 16 kHz mono float32 via an ffmpeg PCM pipe (no temp file)."""
+        cmd = [
+            'ffmpeg', '-loglevel', 'error', '-i', video_path,
+            '-vn', '-ar', '16000', '-ac', '1', '-f', 's16le', '-'
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, timeout=10)
+        if result.returncode != 0:
+            logger.warning(f"Audio extraction skipped: {result.stderr[:100]!r}")
+            return None
+        
+        pcm = np.frombuffer(result.stdout, dtype=np.int16)
+        return pcm.astype(np.float32) / 32768.0
+    
     def extract_audio_text(self, video_path: str) -> str:
-        """Extract text from video audio using FFmpeg + OpenAI Whisper."""
+        """Extract text from video audio using PyAV/FFmpeg + OpenAI Whisper."""
         try:
             # Check if input video exists and is readable
             if not os.path.exists(video_path):
@@ -47,33 +104,25 @@ class SpeechExtractor:
                 logger.error(f"Video file too small: {video_path}")
                 return ""
             
-            # Extract audio from video
-            audio_path = os.path.join(self.temp_dir, "audio.wav")
-            cmd = [
-                'ffmpeg', '-i', video_path, '-ar', '16000', '-ac', '1', 
-                '-c:a', 'pcm_s16le', '-y', audio_path,
-                '-v', 'quiet'  # Suppress FFmpeg output
-            ]
+            # No point decoding audio if nothing can transcribe it
+            model = self._get_whisper_model()
+            if model is None:
+                return ""
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
-                logger.warning(f"Audio extraction skipped: {result.stderr[:100]}")
-                return ""  # Return empty string instead of failing
+            if PYAV_AVAILABLE:
+                # Decode in-process: no fork/exec at all
+                audio = self._decode_audio_pyav(video_path)
+            else:
+                # PCM streamed over ffmpeg's stdout straight into memory
+                audio = self._decode_audio_ffmpeg(video_path)
             
-            # Check if audio file exists and has content
-            if not os.path.exists(audio_path) or os.path.getsize(audio_path) < 1000:
-                logger.warning("Audio file too small or missing, skipping speech detection")
+            if audio is None or audio.size < 500:
+                logger.warning("Audio track too short or missing, skipping speech detection")
                 return ""
             
             # Use OpenAI Whisper for speech recognition
             try:
-                from whisper_singleton import WhisperSingleton
-                
-                whisper_instance = WhisperSingleton()
-                model = whisper_instance.get_model()
-                
-                # Transcribe audio
-                result = model.transcribe(audio_path)
+                result = model.transcribe(audio)
                 transcribed_text = result["text"].strip()
                 
                 if transcribed_text:
@@ -83,10 +132,6 @@ class SpeechExtractor:
                     logger.debug("No speech detected")
                     return ""
                 
-            except ImportError:
-                logger.error("CRITICAL: Whisper not installed - cannot process real speech")
-                logger.error("Install with: pip install openai-whisper")
-                return ""
             except Exception as whisper_error:
                 logger.error(f"CRITICAL: Whisper transcription failed: {whisper_error}")
                 logger.error("Cannot fall back to mock data - real speech required")
@@ -99,16 +144,19 @@ class SpeechExtractor:
     
     
     def cleanup(self):
-        """Clean up temporary files."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        """Release the Whisper model reference (audio never touches disk)."""
+        self._whisper_model = None
 
 class SemanticAnalyzer:
     """Analyze text for excitement and sentiment."""
     
     def __init__(self):
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
         self.sentiment_analyzer = SentimentIntensityAnalyzer()
+        # Transcripts repeat often (silence, catchphrases); memoize VADER by exact text
+        self._polarity_scores = functools.lru_cache(maxsize=256)(
+            self.sentiment_analyzer.polarity_scores
+        )
         
         # Excitement keywords with weights
         self.hype_keywords = {
@@ -130,6 +178,15 @@ class SemanticAnalyzer:
             'thats actually': 1.8, 'im done': 1.5, 'im dead': 1.7
         }
         
+        # One compiled alternation scanned once per text instead of a Python
+        # loop of substring checks. The lookahead makes matches zero-width so
+        # overlapping phrases (e.g. "gg" + "good" in "ggood") are all found.
+        alternation = '|'.join(
+            re.escape(phrase)
+            for phrase in sorted(self.hype_keywords, key=len, reverse=True)
+        )
+        self._hype_pattern = re.compile(f'(?=({alternation}))')
+        
         logger.debug("Semantic analyzer initialized with excitement keywords")
     
     def analyze_text(self, text: str) -> Dict[str, float]:
@@ -139,28 +196,29 @@ class SemanticAnalyzer:
         
         text_lower = text.lower()
         
-        # Get sentiment score
-        sentiment_scores = self.sentiment_analyzer.polarity_scores(text)
+        # Get sentiment score (cached; the returned dict is shared, do not mutate).
+        # Text this short carries no sentiment, so VADER is skipped for it, but
+        # it can still be a hype token such as "gg"
+        if len(text.strip()) < 3:
+            compound = 0.0
+        else:
+            compound = self._polarity_scores(text)['compound']
         
         # Calculate hype word score
-        hype_score = 0.0
-        word_count = 0
-        
-        for phrase, weight in self.hype_keywords.items():
-            if phrase in text_lower:
-                hype_score += weight
-                word_count += 1
+        matched_phrases = set(self._hype_pattern.findall(text_lower))
+        hype_score = sum(self.hype_keywords[phrase] for phrase in matched_phrases)
+        word_count = len(matched_phrases)
         
         # Normalize hype score
         if word_count > 0:
             hype_score = hype_score / word_count
         
         # Calculate overall excitement (combines sentiment and hype)
-        excitement = (sentiment_scores['compound'] + 1) * 0.5 * 0.7 + (hype_score / 3.0) * 0.3
+        excitement = (compound + 1) * 0.5 * 0.7 + (hype_score / 3.0) * 0.3
         excitement = min(excitement, 1.0)  # Cap at 1.0
         
         return {
-            'sentiment': sentiment_scores['compound'],
+            'sentiment': compound,
             'excitement': excitement,
             'hype_score': hype_score,
             'word_count': word_count
@@ -169,10 +227,19 @@ class SemanticAnalyzer:
 class MLFusionModel:
     """Machine learning model to fuse audio, motion, and semantic features."""
     
-    def __init__(self, model_path: str = "models/excitement_model.pkl"):
+    def __init__(self, model_path: str = "models/excitement_model.joblib",
+                 feedback_batch_size: int = 16, feedback_flush_sec: float = 300.0):
         self.model_path = model_path
         self.model = None
         self.scaler = None
+        # Feedback samples are buffered and applied with one partial_fit per batch
+        self.feedback_batch_size = feedback_batch_size
+        self.feedback_flush_sec = feedback_flush_sec
+        self._feedback_buf: List[Dict] = []
+        self._feedback_started = 0.0
+        # Scaler folded into the linear model: p = sigmoid(w . x + b)
+        self._w: Optional[Tuple[float, ...]] = None
+        self._b = 0.0
         self.feature_names = [
             'audio_level', 'motion_level', 'scene_change',
             'sentiment', 'excitement', 'hype_score',
@@ -191,12 +258,33 @@ class MLFusionModel:
     def load_model(self):
         """Load existing model or create a new one."""
         try:
+            legacy_path = os.path.splitext(self.model_path)[0] + '.pkl'
             if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
-                    self.model = model_data['model']
-                    self.scaler = model_data['scaler']
+                import joblib
+                # Numpy arrays are memory-mapped, so workers share the pages
+                model_data = joblib.load(self.model_path, mmap_mode='r')
+                if not hasattr(model_data['model'], 'partial_fit'):
+                    # Pre-SGD models cannot learn online; rebuild instead
+                    logger.info("Replacing non-incremental ML model with an SGD model")
+                    self.create_initial_model()
+                    return
+                self.model = model_data['model']
+                self.scaler = model_data['scaler']
+                self._fold_scaler()
                 logger.debug("Loaded existing ML model")
+            elif legacy_path != self.model_path and os.path.exists(legacy_path):
+                with open(legacy_path, 'rb') as f:
+                    model_data = pickle.load(f)
+                if not hasattr(model_data['model'], 'partial_fit'):
+                    # Same rule as above: not worth migrating a model we'd discard
+                    logger.info("Replacing non-incremental legacy ML model with an SGD model")
+                    self.create_initial_model()
+                    return
+                self.model = model_data['model']
+                self.scaler = model_data['scaler']
+                self._fold_scaler()
+                logger.info(f"Migrating legacy pickle model {legacy_path} to {self.model_path}")
+                self.save_model()
             else:
                 self.create_initial_model()
         except Exception as e:
@@ -205,42 +293,40 @@ class MLFusionModel:
     
     def create_initial_model(self):
         """Create initial model with synthetic training data."""
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+        
         logger.debug("Creating initial ML model with synthetic data...")
         
         # Generate synthetic training data using vectorized operations
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         n_samples = 1000
         
         feature_means = np.array([0.3, 0.2, 0.1, 0.0, 0.4, 0.5])
         feature_stds = np.array([0.2, 0.15, 0.1, 0.3, 0.2, 0.3])
         
         # Generate all features at once
-        data = np.random.normal(feature_means, feature_stds, (n_samples, 6))
+        X = rng.normal(feature_means, feature_stds, size=(n_samples, 6))
+        X[:, 3] = np.maximum(X[:, 3], 0)  # sentiment column
         
         feature_weights = np.array([0.3, 0.2, 0.1, 0.2, 0.15, 0.05])
-        excitement_scores = np.dot(data, feature_weights)
-        
-        data[:, 3] = np.maximum(data[:, 3], 0)  # sentiment column
+        excitement_scores = X @ feature_weights
+        excitement_scores += rng.normal(0, 0.1, n_samples)
+        y = (excitement_scores > 0.5).astype(np.int8)
         
-        excitement_scores += np.random.normal(0, 0.1, n_samples)
-        labels = (excitement_scores > 0.5).astype(int)
-        
-        # Create and train model
-        X = data
-        y = labels
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        # Samples are i.i.d., so a plain slice is an unbiased 80/20 split
+        split = int(n_samples * 0.8)
+        X_train, X_test = X[:split], X[split:]
+        y_train, y_test = y[:split], y[split:]
         
         # Scale features
         self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        # Train model
-        self.model = LogisticRegression(random_state=42)
+        # Train model (logistic loss, so predict_proba and the folded sigmoid
+        # agree; SGD so feedback can be applied with partial_fit later)
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
         self.model.fit(X_train_scaled, y_train)
         
         # Evaluate
@@ -249,24 +335,40 @@ class MLFusionModel:
         
         logger.info(f"Model trained - Train accuracy: {train_score:.3f}, Test accuracy: {test_score:.3f}")
         
+        self._fold_scaler()
+        
         # Save model
         self.save_model()
     
+    def _fold_scaler(self):
+        """Fold StandardScaler into the linear model's weights for fast scoring."""
+        self._w = None
+        if not hasattr(self.model, 'coef_') or not hasattr(self.scaler, 'scale_'):
+            return
+        
+        w = self.model.coef_[0] / self.scaler.scale_
+        b = self.model.intercept_[0] - float(np.dot(w, self.scaler.mean_))
+        self._w = tuple(float(x) for x in w)
+        self._b = float(b)
+    
     def predict_excitement(self, features: Dict[str, float]) -> float:
         """Predict excitement probability from features."""
         if self.model is None or self.scaler is None:
             return 0.5  # Default probability
         
         try:
+            if self._w is not None:
+                # Precomputed linear score + sigmoid; no sklearn dispatch per call
+                z = self._b
+                for weight, name in zip(self._w, MODEL_FEATURES):
+                    z += weight * features.get(name, 0.0)
+                if z >= 0:
+                    return 1.0 / (1.0 + math.exp(-z))
+                e = math.exp(z)
+                return e / (1.0 + e)
+            
             # Extract features in correct order (same as training: 6 features)
-            feature_vector = np.array([[
-                features.get('audio_level', 0.0),
-                features.get('motion_level', 0.0),
-                features.get('scene_change', 0.0),
-                features.get('sentiment', 0.0),
-                features.get('excitement', 0.0),
-                features.get('hype_score', 0.0)
-            ]])
+            feature_vector = np.array([[features.get(name, 0.0) for name in MODEL_FEATURES]])
             
             # Scale features
             feature_vector_scaled = self.scaler.transform(feature_vector)
@@ -289,59 +391,70 @@ class MLFusionModel:
                 'feature_names': self.feature_names
             }
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            import joblib
+            # Uncompressed so numpy arrays can be memory-mapped on load. Write
+            # to a temp file and swap it in: truncating the file in place would
+            # pull the pages out from under any live memory map of it.
+            tmp_path = f"{self.model_path}.tmp"
+            joblib.dump(model_data, tmp_path)
+            os.replace(tmp_path, self.model_path)
                 
             logger.debug(f"Model saved to {self.model_path}")
             
         except Exception as e:
             logger.error(f"Model save error: {e}")
     
+    def add_feedback(self, sample: Dict):
+        """Buffer one feedback sample; retrain once a batch is ready or stale."""
+        if not self._feedback_buf:
+            self._feedback_started = time.monotonic()
+        self._feedback_buf.append(sample)
+        
+        if (len(self._feedback_buf) >= self.feedback_batch_size or
+                time.monotonic() - self._feedback_started >= self.feedback_flush_sec):
+            self.flush_feedback()
+    
+    def flush_feedback(self):
+        """Apply any buffered feedback samples to the model."""
+        if self._feedback_buf:
+            batch, self._feedback_buf = self._feedback_buf, []
+            self.retrain_with_feedback(batch)
+    
     def retrain_with_feedback(self, feedback_data: List[Dict]):
-        """Retrain model with user feedback data."""
-        if not feedback_data:
+        """Update the model incrementally with user feedback data."""
+        if not feedback_data or self.model is None or self.scaler is None:
             return
         
-        logger.debug(f"Retraining model with {len(feedback_data)} feedback samples...")
+        logger.debug(f"Updating model with {len(feedback_data)} feedback samples...")
         
         # Convert feedback to training data
-        X_new = []
-        y_new = []
-        
-        for sample in feedback_data:
-            features = [
-                sample.get('audio_level', 0.0),
-                sample.get('motion_level', 0.0),
-                sample.get('scene_change', 0.0),
-                sample.get('sentiment', 0.0),
-                sample.get('excitement', 0.0),
-                sample.get('hype_score', 0.0)
-            ]
-            
-            label = 1 if sample.get('user_kept', False) else 0
-            
-            X_new.append(features)
-            y_new.append(label)
+        X_new = np.array([[sample.get(name, 0.0) for name in MODEL_FEATURES]
+                          for sample in feedback_data])
+        y_new = np.array([1 if sample.get('user_kept', False) else 0
+                          for sample in feedback_data])
         
-        if len(X_new) > 0:
-            X_new = np.array(X_new)
-            y_new = np.array(y_new)
-            
-            # Scale new features
-            X_new_scaled = self.scaler.transform(X_new)
-            
-            # Retrain (partial fit would be better for online learning)
-            self.model.fit(X_new_scaled, y_new)
-            
-            # Save updated model
-            self.save_model()
-            
-            logger.info("Model retrained with user feedback")
+        # Scaler stays frozen so the feature distribution the model saw is unchanged
+        X_new_scaled = self.scaler.transform(X_new)
+        
+        # Loaded weights may be read-only memory maps; give partial_fit its own copy
+        if isinstance(getattr(self.model, 'coef_', None), np.memmap):
+            self.model.coef_ = np.array(self.model.coef_)
+            self.model.intercept_ = np.array(self.model.intercept_)
+        
+        # One SGD pass over the batch builds on prior training instead of replacing it
+        self.model.partial_fit(X_new_scaled, y_new, classes=np.array([0, 1]))
+        self._fold_scaler()
+        
+        # Save updated model
+        self.save_model()
+        
+        logger.info("Model updated with user feedback")
 
 class DataLogger:
     """Log feature data and model performance."""
     
-    def __init__(self, log_path: str = "data/events.csv"):
+    def __init__(self, log_path: str = "data/events.csv", flush_every: int = 64,
+                 flush_interval_sec: float = 30.0):
         self.log_path = log_path
         
         # Create data directory
@@ -355,8 +468,19 @@ class DataLogger:
                 'clip_triggered', 'speech_text'
             ]
             
-            df = pd.DataFrame(columns=headers)
-            df.to_csv(log_path, index=False)
+            with open(log_path, 'w', newline='') as f:
+                csv.writer(f).writerow(headers)
+        
+        # Rows are buffered and written in batches through one open handle
+        self._fh = open(log_path, 'a', newline='', buffering=8192)
+        self._writer = csv.writer(self._fh)
+        self._buf: List[tuple] = []
+        self._lock = threading.Lock()
+        self._flush_every = flush_every
+        self._flush_interval_sec = flush_interval_sec
+        self._last_flush = time.monotonic()
+        self._warned_closed = False
+        atexit.register(self.close)
         
         logger.debug(f"Data logger initialized: {log_path}")
     
@@ -364,25 +488,58 @@ class DataLogger:
                   clip_triggered: bool, speech_text: str = ""):
         """Log a detection event."""
         try:
-            event_data = {
-                'timestamp': datetime.now().isoformat(),
-                'audio_level': features.get('audio_level', 0.0),
-                'motion_level': features.get('motion_level', 0.0),
-                'scene_change': features.get('scene_change', 0.0),
-                'sentiment': features.get('sentiment', 0.0),
-                'excitement': features.get('excitement', 0.0),
-                'hype_score': features.get('hype_score', 0.0),
-                'ml_probability': ml_prob,
-                'clip_triggered': clip_triggered,
-                'speech_text': speech_text
-            }
+            row = (
+                datetime.now().isoformat(),
+                features.get('audio_level', 0.0),
+                features.get('motion_level', 0.0),
+                features.get('scene_change', 0.0),
+                features.get('sentiment', 0.0),
+                features.get('excitement', 0.0),
+                features.get('hype_score', 0.0),
+                ml_prob,
+                clip_triggered,
+                speech_text
+            )
             
-            # Append to CSV
-            df = pd.DataFrame([event_data])
-            df.to_csv(self.log_path, mode='a', header=False, index=False)
+            with self._lock:
+                if self._fh.closed:
+                    # Nothing would ever write these rows; don't let them pile up
+                    if not self._warned_closed:
+                        logger.warning("Data logger is closed; dropping events")
+                        self._warned_closed = True
+                    return
+                self._buf.append(row)
+                if (len(self._buf) >= self._flush_every or
+                        time.monotonic() - self._last_flush >= self._flush_interval_sec):
+                    self._flush_locked()
             
         except Exception as e:
             logger.error(f"Logging error: {e}")
+    
+    def _flush_locked(self):
+        """Write buffered rows to disk. Caller must hold self._lock."""
+        if self._buf and not self._fh.closed:
+            self._writer.writerows(self._buf)
+            self._fh.flush()
+            self._buf.clear()
+        self._last_flush = time.monotonic()
+    
+    def flush(self):
+        """Write any buffered rows to disk."""
+        with self._lock:
+            self._flush_locked()
+    
+    def close(self):
+        """Flush buffered rows and close the CSV file."""
+        with self._lock:
+            if self._fh.closed:
+                return
+            try:
+                self._flush_locked()
+            except Exception as e:
+                logger.error(f"Logging error: {e}")
+            finally:
+                self._fh.close()
 
 class AIHighlightDetector:
     """Main AI-powered highlight detection system."""
@@ -396,7 +553,9 @@ class AIHighlightDetector:
         # Detection parameters
         self.excitement_threshold = 0.80  # ML probability threshold
         self.consecutive_triggers = 2     # Require 2 consecutive high-probability detections
-        self.trigger_history = []
+        # Recent trigger decisions as a bitmask (newest in bit 0)
+        self._trigger_bits = 0
+        self._trigger_mask = (1 << self.consecutive_triggers) - 1
         
         logger.info("AI Highlight Detector initialized!")
     
@@ -444,18 +603,12 @@ class AIHighlightDetector:
     
     def _should_trigger_clip(self, ml_probability: float) -> bool:
         """Determine if we should trigger a clip based on ML probability."""
-        # Add to trigger history
-        self.trigger_history.append(ml_probability >= self.excitement_threshold)
-        
-        # Keep only recent history
-        if len(self.trigger_history) > self.consecutive_triggers:
-            self.trigger_history.pop(0)
-        
-        # Check if we have enough consecutive triggers
-        if len(self.trigger_history) >= self.consecutive_triggers:
-            return all(self.trigger_history[-self.consecutive_triggers:])
+        # Shift in the latest decision; bits older than the window fall off the mask
+        hit = 1 if ml_probability >= self.excitement_threshold else 0
+        self._trigger_bits = ((self._trigger_bits << 1) | hit) & self._trigger_mask
         
-        return False
+        # All of the last N decisions were high-probability
+        return self._trigger_bits == self._trigger_mask
     
     def process_user_feedback(self, clip_data: Dict[str, Any], user_kept: bool):
         """Process user feedback for model improvement."""
@@ -464,15 +617,16 @@ class AIHighlightDetector:
             'user_kept': user_kept
         }
         
-        # For now, just log feedback (could batch for nightly retraining)
         logger.debug(f"User feedback: {'Kept' if user_kept else 'Deleted'} clip")
         
-        # In production, this would be batched and used for nightly retraining
-        self.ml_model.retrain_with_feedback([feedback_sample])
+        # Batched; the model is updated once enough feedback has accumulated
+        self.ml_model.add_feedback(feedback_sample)
     
     def cleanup(self):
         """Clean up resources."""
         self.speech_extractor.cleanup()
+        self.ml_model.flush_feedback()
+        self.data_logger.close()
 
 # Test the AI detector
 if __name__ == "__main__":
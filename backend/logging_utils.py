@@ -1,17 +1,84 @@
+import atexit
 import logging
 import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
-def setup_logger(name: str) -> logging.Logger:
-    """Set up logger with appropriate level based on environment."""
+# Shared queue + listener for loggers that opt into off-thread I/O
+_log_queue: Optional[queue.SimpleQueue] = None
+_queue_listener: Optional[QueueListener] = None
+
+def _build_stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    handler.setFormatter(formatter)
+    return handler
+
+def _get_log_queue() -> queue.SimpleQueue:
+    """Return the shared log queue, starting its background listener on first use."""
+    global _log_queue, _queue_listener
+    if _queue_listener is None:
+        _log_queue = queue.SimpleQueue()
+        _queue_listener = QueueListener(_log_queue, _build_stream_handler())
+        _queue_listener.start()
+        atexit.register(_queue_listener.stop)
+    return _log_queue
+
+class DedupFilter(logging.Filter):
+    """Suppress consecutive records that share a level and message template.
+
+    Repeats of the same (levelno, msg) arriving within window_sec of the last
+    emitted one are dropped. The next record that does get through carries a
+    suppressed_count attribute and a "repeated N× in last Ns" trailer.
+    """
+
+    def __init__(self, window_sec: float = 2.0):
+        super().__init__()
+        self.window_sec = window_sec
+        self._lock = threading.Lock()
+        self._last_key = None
+        self._last_emit = 0.0
+        self._last_seen = 0.0
+        self._suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.levelno, record.msg)
+        now = record.created
+        with self._lock:
+            if key == self._last_key and now - self._last_emit < self.window_sec:
+                self._suppressed += 1
+                self._last_seen = now
+                return False
+
+            record.suppressed_count = self._suppressed
+            if self._suppressed:
+                span = self._last_seen - self._last_emit
+                record.msg = (f"{record.getMessage()} "
+                              f"(previous message repeated {self._suppressed}× in last {span:.0f}s)")
+                record.args = None
+
+            self._last_key = key
+            self._last_emit = now
+            self._suppressed = 0
+        return True
+
+def setup_logger(name: str, use_queue: bool = False) -> logging.Logger:
+    """Set up logger with appropriate level based on environment.
+
+    With use_queue=True records are handed to a background QueueListener so
+    callers on hot paths never block on the stream write.
+    """
     logger = logging.getLogger(name)
-    
+
     level = logging.DEBUG if os.getenv('DEBUG', '').lower() == 'true' else logging.INFO
     logger.setLevel(level)
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s [%(name)s] %(levelname)s: %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    
+        if use_queue:
+            logger.addHandler(QueueHandler(_get_log_queue()))
+        else:
+            logger.addHandler(_build_stream_handler())
+
     return logger
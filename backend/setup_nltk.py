@@ -7,20 +7,46 @@ from backend.logging_utils import setup_logger
 
 logger = setup_logger(__name__)
 
+# (resource path checked with nltk.data.find, package name for nltk.download)
+REQUIRED_NLTK_DATA = (
+    ('tokenizers/punkt', 'punkt'),
+    ('corpora/stopwords', 'stopwords'),
+    # vader_lexicon is installed as a zip and never extracted
+    ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+)
+
+def _missing_packages():
+    """Return the required NLTK packages that are not installed yet."""
+    missing = []
+    for resource, package in REQUIRED_NLTK_DATA:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+    return missing
+
 def setup_nltk():
-    """Download required NLTK data."""
+    """Download required NLTK data that is not already on disk."""
     try:
         # Set NLTK data path
         nltk_data_dir = os.path.expanduser('~/nltk_data')
         if not os.path.exists(nltk_data_dir):
             os.makedirs(nltk_data_dir)
         
-        # Download required datasets
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('vader_lexicon', quiet=True)
+        missing = _missing_packages()
+        if not missing:
+            logger.debug("NLTK data already present")
+            return True
+        
+        # One at a time: nltk.download shares a single Downloader and its index
+        results = [nltk.download(pkg, quiet=True) for pkg in missing]
+        
+        if not all(results):
+            failed = [pkg for pkg, ok in zip(missing, results) if not ok]
+            logger.error(f"NLTK setup error: failed to download {', '.join(failed)}")
+            return False
         
-        logger.info("NLTK data downloaded successfully")
+        logger.info(f"NLTK data downloaded successfully: {', '.join(missing)}")
         return True
     except Exception as e:
         logger.error(f"NLTK setup error: {e}")
@@ -13,12 +13,13 @@ import subprocess
 import tempfile
 import shutil
 import re
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from queue import Queue, Empty
+from typing import Dict, Any, Optional, List, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from collections import deque
-import statistics
 import numpy as np
 
 """Stream processor main module.
@@ -41,7 +42,7 @@ except Exception:
     try:  # Fallback when run from inside backend/ directly
         from logging_utils import setup_logger  # type: ignore
     except Exception as _e:  # Final fallback: minimal stub
-        def setup_logger(name):  # noqa: D401
+        def setup_logger(name, use_queue=False):  # noqa: D401
             import logging
             logging.basicConfig(level=logging.INFO)
             return logging.getLogger(name)
@@ -55,7 +56,8 @@ try:
 except Exception:
     pass
 
-logger = setup_logger(__name__)
+# Queued so capture/analysis threads hand records off instead of writing stderr
+logger = setup_logger(__name__, use_queue=True)
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -64,6 +66,21 @@ logger = setup_logger(__name__)
 # override via environment variable API_BASE_URL for Docker / deployment.
 BASE_API_URL = os.environ.get('API_BASE_URL', 'http://localhost:5001').rstrip('/')
 
+# FFmpeg analyzer output: group 1 is an astats RMS level, group 2 a scene score
+_METRIC_RE = re.compile(rb'lavfi\.(?:astats\.Overall\.RMS_level=(-?[\d.]+)|scene_score=([\d.]+))')
+
+# Channel from URLs like https://www.twitch.tv/papaplatte (for the Ad Gatekeeper)
+_TWITCH_CHANNEL_RE = re.compile(r'twitch\.tv/([^/?#]+)')
+
+# Decoder/filter threading for the live analyzer, the only FFmpeg process that
+# decodes the stream (bucket capture is a stream copy). Its filter graphs are
+# small, so more than a few threads would only add scheduling overhead.
+_FFMPEG_FILTER_THREADS = max(1, min(4, os.cpu_count() or 1))
+_FFMPEG_THREAD_ARGS = ['-threads', '0', '-filter_threads', str(_FFMPEG_FILTER_THREADS)]
+
+# Shared generator for the jitter added to live analyzer readings
+_RNG = np.random.default_rng()
+
 # Import AI detector
 try:
     from ai_detector import AIHighlightDetector
@@ -83,9 +100,84 @@ except ImportError as e:
     logger.warning(f"Ad Gatekeeper not available: {e}")
     AD_GATEKEEPER_AVAILABLE = False
 
+# Request bodies for the server API. orjson is optional: it is much faster
+# for the 1 Hz metrics POST and also handles NumPy scalars from the analyzer.
+try:
+    import orjson
+
+    def _json_body(payload: Dict[str, Any]) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _json_body(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload).encode('utf-8')
+
+def _drop_page_cache(path: str):
+    """Advise the kernel that a file's cached pages will not be needed again.
+
+    No-op where posix_fadvise is unavailable (e.g. Windows/macOS).
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def _run_ffmpeg_streaming(cmd: List[str], timeout: float, tail_lines: int = 20) -> subprocess.CompletedProcess:
+    """Run a long FFmpeg command, reading stderr as it arrives.
+
+    Unlike subprocess.run(capture_output=True), the full log is never held in
+    memory or decoded; only the last tail_lines lines are kept for error
+    reporting. Raises subprocess.TimeoutExpired like subprocess.run.
+    """
+    # -nostats: progress updates are \r-separated and would form one endless line
+    cmd = [cmd[0], '-nostats', *cmd[1:]]
+    tail = deque(maxlen=tail_lines)
+    timed_out = threading.Event()
+
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE) as proc:
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            for raw_line in proc.stderr:
+                tail.append(raw_line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    stderr = b''.join(tail).decode('utf-8', 'replace')
+    return subprocess.CompletedProcess(cmd, returncode, stdout='', stderr=stderr)
+
+def _first_anomaly(levels: np.ndarray, means: np.ndarray, stds: np.ndarray, sensitivity: np.ndarray) -> Tuple[int, float]:
+    """Return (index, z-score) of the first metric at or over its threshold.
+
+    Pure array math with no Python objects, so it can be JIT-compiled as-is.
+    Returns (-1, 0.0) when no metric is anomalous.
+    """
+    z = (levels - means) / stds
+    hits = z >= sensitivity
+    if not hits.any():
+        return -1, 0.0
+    idx = int(np.argmax(hits))
+    return idx, float(z[idx])
+
 class BaselineTracker:
     """Tracks baseline metrics for adaptive threshold detection."""
 
+    ANOMALY_LABELS = ('Audio', 'Motion', 'Scene')
+
     def __init__(self, calibration_seconds: int = 120):
         """
         Initialize baseline tracker.
@@ -95,13 +187,15 @@ class BaselineTracker:
         """
         self.calibration_seconds = calibration_seconds
         self.calibration_start = None
+        self._calibration_deadline = math.inf
         self.is_calibrating = True
         self.is_calibrated = False
 
-        # Metric collections for baseline calculation
-        self.audio_levels = deque(maxlen=1000)
-        self.motion_levels = deque(maxlen=1000)
-        self.scene_changes = deque(maxlen=1000)
+        # Running [audio, motion, scene] statistics (Welford's online algorithm),
+        # so finalizing calibration is a state read rather than a pass over samples
+        self.sample_count = 0
+        self._running_mean = np.zeros(3)
+        self._running_m2 = np.zeros(3)
 
         # Calculated baseline statistics
         self.audio_baseline = {'mean': 0, 'std': 1}
@@ -113,9 +207,17 @@ class BaselineTracker:
         self.motion_sensitivity = 2.0  # Motion needs 2.0 std above baseline
         self.scene_sensitivity = 1.5   # Scene changes need 1.5 std above baseline
 
+        # Baselines and thresholds packed as [audio, motion, scene] for one
+        # vectorized check; refreshed by _pack_baselines
+        self._means = np.zeros(3)
+        self._stds = np.ones(3)
+        self._sensitivity = np.array([self.audio_sensitivity, self.motion_sensitivity, self.scene_sensitivity])
+
     def start_calibration(self):
         """Start the calibration period."""
-        self.calibration_start = time.time()
+        # Monotonic clock, so wall-clock (NTP) steps cannot cut calibration short
+        self.calibration_start = time.monotonic()
+        self._calibration_deadline = self.calibration_start + self.calibration_seconds
         self.is_calibrating = True
         self.is_calibrated = False
         logger.info(f"Starting {self.calibration_seconds}s baseline calibration...")
@@ -123,30 +225,34 @@ class BaselineTracker:
     def add_metrics(self, audio_level: float, motion_level: float, scene_change: float):
         """Add new metrics to baseline tracking."""
         if self.is_calibrating:
-            self.audio_levels.append(audio_level)
-            self.motion_levels.append(motion_level)
-            self.scene_changes.append(scene_change)
+            sample = np.array([audio_level, motion_level, scene_change], dtype=float)
+
+            self.sample_count += 1
+            delta = sample - self._running_mean
+            self._running_mean += delta / self.sample_count
+            self._running_m2 += delta * (sample - self._running_mean)
 
             # Check if calibration period is complete
-            if (time.time() - self.calibration_start) >= self.calibration_seconds:
+            if time.monotonic() >= self._calibration_deadline:
                 self._finalize_calibration()
 
     def _finalize_calibration(self):
         """Calculate baseline statistics from collected data."""
-        if len(self.audio_levels) < 10:  # Reduced minimum samples for faster calibration
+        if self.sample_count < 10:  # Reduced minimum samples for faster calibration
             logger.warning("Insufficient data for calibration, extending period...")
             return
 
         # Calculate baseline statistics with safety checks
         try:
-            audio_mean = statistics.mean(self.audio_levels)
-            audio_std = statistics.stdev(self.audio_levels) if len(self.audio_levels) > 1 else 1.0
-
-            motion_mean = statistics.mean(self.motion_levels)
-            motion_std = statistics.stdev(self.motion_levels) if len(self.motion_levels) > 1 else 1.0
+            # Sample mean/std straight from the running Welford state
+            means = self._running_mean
+            if self.sample_count > 1:
+                stds = np.sqrt(self._running_m2 / (self.sample_count - 1))
+            else:
+                stds = np.array([1.0, 1.0, 0.1])
 
-            scene_mean = statistics.mean(self.scene_changes)
-            scene_std = statistics.stdev(self.scene_changes) if len(self.scene_changes) > 1 else 0.1
+            audio_mean, motion_mean, scene_mean = (float(x) for x in means)
+            audio_std, motion_std, scene_std = (float(x) for x in stds)
 
             self.audio_baseline = {
                 'mean': audio_mean,
@@ -162,6 +268,7 @@ class BaselineTracker:
                 'mean': scene_mean,
                 'std': max(scene_std, 0.1)
             }
+            self._pack_baselines()
 
             self.is_calibrating = False
             self.is_calibrated = True
@@ -177,40 +284,36 @@ class BaselineTracker:
             self.audio_baseline = {'mean': 50, 'std': 10}
             self.motion_baseline = {'mean': 30, 'std': 15}
             self.scene_baseline = {'mean': 0.1, 'std': 0.2}
+            self._pack_baselines()
             self.is_calibrating = False
             self.is_calibrated = True
             logger.warning("Using default baseline values")
 
+    def _pack_baselines(self):
+        """Copy the baseline dicts and sensitivities into the arrays used by check_anomaly."""
+        self._means = np.array([self.audio_baseline['mean'], self.motion_baseline['mean'], self.scene_baseline['mean']])
+        self._stds = np.array([self.audio_baseline['std'], self.motion_baseline['std'], self.scene_baseline['std']])
+        self._sensitivity = np.array([self.audio_sensitivity, self.motion_sensitivity, self.scene_sensitivity])
+
     def check_anomaly(self, audio_level: float, motion_level: float, scene_change: float) -> Optional[str]:
         """Check if current metrics represent an anomaly worth clipping."""
         if not self.is_calibrated:
             return None  # Don't detect during calibration
 
-        # Calculate z-scores (how many standard deviations above baseline)
-        audio_z = (audio_level - self.audio_baseline['mean']) / self.audio_baseline['std']
-        motion_z = (motion_level - self.motion_baseline['mean']) / self.motion_baseline['std']
-        scene_z = (scene_change - self.scene_baseline['mean']) / self.scene_baseline['std']
-
-        # Check for anomalies
-        if audio_z >= self.audio_sensitivity:
-            confidence = min(100, int((audio_z / self.audio_sensitivity) * 100))
-            return f"Audio Anomaly ({confidence}% confidence, +{audio_z:.1f}σ)"
-
-        if motion_z >= self.motion_sensitivity:
-            confidence = min(100, int((motion_z / self.motion_sensitivity) * 100))
-            return f"Motion Anomaly ({confidence}% confidence, +{motion_z:.1f}σ)"
-
-        if scene_z >= self.scene_sensitivity:
-            confidence = min(100, int((scene_z / self.scene_sensitivity) * 100))
-            return f"Scene Anomaly ({confidence}% confidence, +{scene_z:.1f}σ)"
+        # First metric over its threshold wins, in audio > motion > scene priority
+        levels = np.array([audio_level, motion_level, scene_change])
+        idx, z = _first_anomaly(levels, self._means, self._stds, self._sensitivity)
+        if idx < 0:
+            return None
 
-        return None
+        confidence = min(100, int((z / self._sensitivity[idx]) * 100))
+        return f"{self.ANOMALY_LABELS[idx]} Anomaly ({confidence}% confidence, +{z:.1f}σ)"
 
     def get_calibration_progress(self) -> float:
         """Get calibration progress as percentage."""
         if not self.is_calibrating:
             return 100.0
-        elapsed = time.time() - self.calibration_start
+        elapsed = time.monotonic() - self.calibration_start
         return min(100.0, (elapsed / self.calibration_seconds) * 100)
 
     def adapt_sensitivity(self, clip_feedback: str = None):
@@ -221,13 +324,14 @@ class BaselineTracker:
 class StreamBucket:
     """Bucket-based continuous video capture for smooth clipping."""
 
-    def __init__(self, clip_duration: int = 30, session_temp_dir: str = None):
+    def __init__(self, clip_duration: int = 30, session_temp_dir: str = None, slot_count: int = 3):
         """
         Initialize StreamBucket with session-specific temporary directory.
         
         Args:
             clip_duration: Duration of clips to prepare in advance
             session_temp_dir: Session-specific temporary directory path
+            slot_count: Number of bucket files reused in rotation
         """
         self.clip_duration = clip_duration
         if session_temp_dir:
@@ -235,6 +339,14 @@ class StreamBucket:
         else:
             self.temp_dir = tempfile.mkdtemp(prefix="stream_bucket_")
         
+        # Fixed ring of bucket files, overwritten in place instead of creating
+        # and unlinking a new file per bucket. Three slots keep the bucket being
+        # clipped from being the one FFmpeg is currently rewriting.
+        self.slots = [os.path.join(self.temp_dir, f"bucket_slot_{i}.mp4") for i in range(slot_count)]
+        self._slot_set = frozenset(self.slots)
+        # Only files left over from before this bucket existed can be stale
+        self._may_have_stray_files = True
+        
         self.current_bucket_path = None
         self.current_bucket_start_time = None
         self.bucket_counter = 0
@@ -243,8 +355,14 @@ class StreamBucket:
     def start_new_bucket(self) -> str:
         """Start recording a new continuous video bucket."""
         self.bucket_counter += 1
-        bucket_filename = f"bucket_{self.bucket_counter:06d}.mp4"
-        bucket_path = os.path.join(self.temp_dir, bucket_filename)
+        bucket_path = self.slots[self.bucket_counter % len(self.slots)]
+        bucket_filename = os.path.basename(bucket_path)
+
+        # Truncate (not unlink) so stale content from the slot's last use is never read
+        try:
+            os.truncate(bucket_path, 0)
+        except FileNotFoundError:
+            pass
 
         self.current_bucket_path = bucket_path
         self.current_bucket_start_time = time.time()
@@ -264,7 +382,11 @@ class StreamBucket:
         }
 
     def save_bucket_as_clip(self, clip_path: str, detection_time: float, source_bucket_path: str = None) -> bool:
-        """Save a completed bucket as a highlight clip using FFmpeg.
+        """Save a completed bucket as a highlight clip.
+
+        Buckets are already faststart MP4s written by FFmpeg, so the clip is a
+        plain kernel-side file copy (sendfile on Linux). A hardlink is not used
+        because bucket slots are truncated in place when they are reused.
 
         Args:
             clip_path: Destination mp4 path.
@@ -277,21 +399,18 @@ class StreamBucket:
             print("❌ No bucket path provided")
             return False
 
-        if not os.path.exists(bucket_source):
-            print(f"❌ Bucket file not found: {bucket_source}")
-            return False
-
         try:
             # Check if bucket file has reasonable size
             bucket_size = os.path.getsize(bucket_source)
-            if bucket_size < 50000:  # Less than 50KB probably isn't a valid video
-                print(f"❌ Bucket file too small ({bucket_size} bytes): {bucket_source}")
-                return False
+        except FileNotFoundError:
+            print(f"❌ Bucket file not found: {bucket_source}")
+            return False
 
-            # Wait a moment to ensure the bucket file is completely written
-            import time
-            time.sleep(0.5)  # Reduced wait time
+        if bucket_size < 50000:  # Less than 50KB probably isn't a valid video
+            print(f"❌ Bucket file too small ({bucket_size} bytes): {bucket_source}")
+            return False
 
+        try:
             # Verify the source bucket is valid before copying
             probe_cmd = [
                 'ffprobe',
@@ -308,43 +427,32 @@ class StreamBucket:
                 print(f"❌ Source bucket is invalid: {probe_result.stderr}")
                 return False
 
-            # Use FFmpeg to ensure a valid MP4 output with proper headers
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-i', bucket_source,
-                '-c', 'copy',  # Copy streams without re-encoding
-                '-movflags', '+faststart',  # Ensure proper MP4 structure
-                '-y',  # Overwrite output
-                clip_path
-            ]
-
-            print(f"🔧 Processing bucket into valid clip...")
-            ffmpeg_result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=30)
+            # Copy to a temp name first so readers never see a partial clip
+            tmp_path = clip_path + '.part'
+            shutil.copyfile(bucket_source, tmp_path)
+            os.replace(tmp_path, clip_path)
 
-            if ffmpeg_result.returncode == 0 and os.path.exists(clip_path):
-                file_size = os.path.getsize(clip_path)
-                if file_size > 100000:  # Ensure reasonable file size
-                    print(f"✅ Valid clip created: {clip_path} ({file_size} bytes)")
-                    return True
-                else:
-                    print(f"❌ Output clip too small: {file_size} bytes")
-                    return False
-            else:
-                print(f"❌ FFmpeg clip processing failed: {ffmpeg_result.stderr}")
-                return False
+            print(f"✅ Valid clip created: {clip_path} ({bucket_size} bytes)")
+            return True
 
         except Exception as e:
             print(f"❌ Error saving bucket as clip: {e}")
             return False
 
     def cleanup_old_buckets(self):
-        """Clean up old bucket files to save space."""
+        """Clean up stale bucket files to save space."""
+        # Slots are reused in place, so only a pre-existing directory needs a scan
+        if not self._may_have_stray_files:
+            return
+
         try:
-            # Keep only the current bucket, remove others
-            for filename in os.listdir(self.temp_dir):
-                file_path = os.path.join(self.temp_dir, filename)
-                if file_path != self.current_bucket_path and os.path.isfile(file_path):
-                    os.remove(file_path)
+            # Keep the slot files, remove anything else. DirEntry.is_file uses
+            # the type from the directory read, so no per-file stat() is needed.
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if entry.path not in self._slot_set and entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+            self._may_have_stray_files = False
         except Exception as e:
             print(f"Warning: Error cleaning up old buckets: {e}")
 
@@ -374,21 +482,314 @@ class StreamBucket:
         self.bucket_counter = 0
         self.is_recording_bucket = False
 
+class LiveStreamAnalyzer:
+    """Persistent FFmpeg process that reports audio/scene metrics for a live stream.
+
+    One long-lived ffmpeg decodes the stream and emits per-chunk RMS levels and
+    scene scores; reader threads collect them into rolling windows. This
+    replaces spawning (and warming up) a new ffmpeg for every sample.
+
+    On POSIX the metadata filters write plain key=value lines to dedicated
+    pipes, so nothing has to be picked out of ffmpeg's log. Elsewhere the
+    values are scanned out of stderr.
+    """
+
+    def __init__(self, scene_threshold: float = 0.1, history: int = 2048,
+                 no_data_timeout: float = 30.0):
+        """
+        Initialize the analyzer (no process is started until start()).
+
+        Args:
+            scene_threshold: Minimum scene score for a frame to be reported
+            history: Maximum samples kept per metric
+            no_data_timeout: Seconds after start without any audio sample before
+                the analyzer is considered broken
+        """
+        self.scene_threshold = scene_threshold
+        self.no_data_timeout = no_data_timeout
+        self.broken = False
+        self._started_at: Optional[float] = None
+        self.process = None
+        self.reader_threads: List[threading.Thread] = []
+        self.stream_url = None
+        self.ffmpeg_unavailable = False
+        self.use_metadata_pipes = os.name == 'posix'
+
+        self._lock = threading.Lock()
+        self._rms_samples = deque(maxlen=history)    # (monotonic time, RMS dB)
+        self._scene_samples = deque(maxlen=history)  # (monotonic time, scene score)
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ensure_running(self, stream_url: str) -> bool:
+        """Start the analyzer on stream_url unless it is already running."""
+        if self.is_running:
+            return True
+        if self.broken:
+            return False
+        return self.start(stream_url)
+
+    def start(self, stream_url: str) -> bool:
+        """Spawn the long-lived FFmpeg analysis process for stream_url."""
+        if self.ffmpeg_unavailable:
+            return False
+
+        self.stop()
+
+        audio_file = scene_file = ''
+        pipes = []
+        if self.use_metadata_pipes:
+            # One pipe per filter: two writers on one fd could interleave lines
+            audio_r, audio_w = os.pipe()
+            scene_r, scene_w = os.pipe()
+            pipes = [(audio_r, audio_w, self._rms_samples), (scene_r, scene_w, self._scene_samples)]
+            # The colon is escaped for both the filtergraph and the option
+            # parser; a single escape makes ffmpeg write to a file named "pipe"
+            audio_file = f':file=pipe\\\\:{audio_w}'
+            scene_file = f':file=pipe\\\\:{scene_w}'
+
+        cmd = [
+            'ffmpeg',
+            '-hide_banner',
+            '-nostats',
+            *_FFMPEG_THREAD_ARGS,
+            '-i', stream_url,
+            # ~100 ms audio chunks, each annotated with its own RMS level
+            '-af', 'asetnsamples=n=4800,astats=metadata=1:reset=1,'
+                   f'ametadata=print:key=lavfi.astats.Overall.RMS_level{audio_file}',
+            # Scene scores barely change at low resolution in grayscale, and
+            # scaling after fps=2 keeps the comparison cost tiny
+            '-vf', f'fps=2,scale=320:180:flags=fast_bilinear,format=gray,'
+                   f'select=gt(scene\\,{self.scene_threshold}),'
+                   f'metadata=print:key=lavfi.scene_score{scene_file}',
+            '-f', 'null',
+            '-'
+        ]
+
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL if pipes else subprocess.PIPE,
+                pass_fds=tuple(w for _, w, _ in pipes),
+                bufsize=0  # Raw pipe: read() returns whatever is available
+            )
+        except FileNotFoundError:
+            print("⚠️ ffmpeg not found - live stream analysis disabled")
+            self.ffmpeg_unavailable = True
+            self.process = None
+            for r, w, _ in pipes:
+                os.close(r)
+                os.close(w)
+            return False
+
+        self.stream_url = stream_url
+        self._started_at = time.monotonic()
+        with self._lock:
+            self._rms_samples.clear()
+            self._scene_samples.clear()
+        if pipes:
+            for r, w, samples in pipes:
+                os.close(w)  # The child holds the write end now
+                self.reader_threads.append(threading.Thread(
+                    target=self._read_metadata_pipe, args=(r, samples), daemon=True
+                ))
+        else:
+            self.reader_threads.append(threading.Thread(
+                target=self._read_metrics, args=(self.process,), daemon=True
+            ))
+        for thread in self.reader_threads:
+            thread.start()
+
+        print("📈 Live stream analyzer started")
+        return True
+
+    def _read_metadata_pipe(self, fd: int, samples: deque):
+        """Collect values from a metadata filter's key=value pipe until EOF."""
+        pending = b''
+        with open(fd, 'rb', buffering=0) as pipe:
+            while True:
+                chunk = pipe.read(65536)
+                if not chunk:
+                    break
+
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()  # Partial last line, completed by the next read
+
+                values = []
+                for line in lines:
+                    # Lines are either "frame:N pts:... pts_time:..." or "lavfi.key=value"
+                    if line.startswith(b'lavfi.'):
+                        try:
+                            values.append(float(line.partition(b'=')[2]))
+                        except ValueError:
+                            pass
+
+                if values:
+                    now = time.monotonic()
+                    with self._lock:
+                        samples.extend((now, value) for value in values)
+
+    def _read_metrics(self, process):
+        """Parse metric lines from FFmpeg stderr until the process exits.
+
+        Stderr is read in large raw chunks and scanned with a single finditer
+        per chunk, instead of decoding and regex-searching line by line.
+        """
+        finditer = _METRIC_RE.finditer
+        pending = b''
+
+        while True:
+            chunk = process.stderr.read(65536)
+            if not chunk:
+                break
+
+            # Only scan complete lines; carry the partial tail to the next read
+            data = pending + chunk
+            cut = data.rfind(b'\n') + 1
+            data, pending = data[:cut], data[cut:]
+            if not data:
+                continue
+
+            rms_values = []
+            scene_values = []
+            for match in finditer(data):
+                rms, scene = match.groups()
+                if rms is not None:
+                    rms_values.append(float(rms))
+                else:
+                    scene_values.append(float(scene))
+
+            if rms_values or scene_values:
+                now = time.monotonic()
+                with self._lock:
+                    self._rms_samples.extend((now, value) for value in rms_values)
+                    self._scene_samples.extend((now, value) for value in scene_values)
+
+    def check_stalled(self) -> bool:
+        """Mark the analyzer broken if no audio sample arrived within no_data_timeout of start."""
+        if self.broken:
+            return True
+        if self._started_at is None or self._rms_samples:
+            return False
+        if time.monotonic() - self._started_at < self.no_data_timeout:
+            return False
+
+        logger.error("Live stream analyzer produced no samples %.0fs after start - disabling it",
+                     self.no_data_timeout)
+        self.broken = True
+        self.stop()
+        return True
+
+    def snapshot(self, window_sec: float = 2.0) -> Optional[Dict[str, float]]:
+        """Metrics over the last window_sec seconds, or None if there is no audio data.
+
+        audio_db_change is the window's peak RMS level above the mean level of
+        the older samples still in history, so it tracks how much louder the
+        stream got rather than how loud it is.
+        """
+        cutoff = time.monotonic() - window_sec
+        latest_rms = None
+        max_rms = max_scene = -math.inf
+        window_sum = baseline_sum = 0.0
+        window_count = baseline_count = 0
+        with self._lock:
+            for ts, db in reversed(self._rms_samples):
+                in_window = ts >= cutoff
+                if in_window:
+                    if latest_rms is None:
+                        latest_rms = db
+                    if db > max_rms:
+                        max_rms = db
+                if not math.isfinite(db):
+                    continue  # Digital silence reports -inf
+                if in_window:
+                    window_sum += db
+                    window_count += 1
+                else:
+                    baseline_sum += db
+                    baseline_count += 1
+            # Newest samples are on the right: walk back only as far as the window
+            for ts, score in reversed(self._scene_samples):
+                if ts < cutoff:
+                    break
+                if score > max_scene:
+                    max_scene = score
+
+        if latest_rms is None:
+            return None
+
+        metrics = {
+            'frames_analyzed': 60,  # Default to 60 frames (assuming 30fps, 2s segment)
+            'audio_level': 0.0,
+            'motion_level': 0.0,
+            'scene_change': 0.0,
+            'audio_db_change': 0.0,
+        }
+
+        # Until older samples exist the window is its own baseline
+        if baseline_count:
+            baseline_db = baseline_sum / baseline_count
+        elif window_count:
+            baseline_db = window_sum / window_count
+        else:
+            baseline_db = max_rms
+
+        # UI display level from the most recent chunk, peak rise for detection
+        metrics['audio_level'] = max(0, min(100, (latest_rms + 60) * 1.67))
+        if math.isfinite(max_rms):
+            metrics['audio_db_change'] = min(20, max(0, max_rms - baseline_db))
+
+        if max_scene > -math.inf:
+            metrics['scene_change'] = max_scene
+            metrics['motion_level'] = min(100, max_scene * 100)  # Scale to 0-100
+
+        return metrics
+
+    def stop(self):
+        """Terminate the FFmpeg process and wait for the reader to drain."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        for thread in self.reader_threads:
+            thread.join(timeout=2)
+        self.reader_threads = []
+
 class StreamProcessor:
     """Main stream processor with highlight detection and clipping."""
 
+    # streamlink command verified by _ensure_streamlink (shared by all instances)
+    _streamlink_cmd: Optional[str] = None
+
     def __init__(self, config: Dict[str, Any]):
         """Initialize stream processor with configuration."""
         self.config = config
         self.clip_length = config.get('clipLength', 30)
         self.stream_buffer = None
+        self._stop_event = threading.Event()  # Set whenever is_running is False
         self.is_running = False
         self.capture_thread = None
         self.analysis_thread = None
 
         # Processing stats
+        # frames_processed has a single writer (the analysis thread);
+        # clips_generated is bumped from the analysis and test-clip threads,
+        # so its read-modify-write goes through _stats_lock
         self.frames_processed = 0
         self.clips_generated = 0
+        self._stats_lock = threading.Lock()
         self.start_time = None
 
         # Stream end detection
@@ -406,28 +807,56 @@ class StreamProcessor:
         # Completed bucket registry
         self.completed_buckets: List[str] = []
 
+        # (path, size, mtime) of the last analyzed bucket, to skip repeats
+        self._last_analyzed_key = None
+
+        # Set by the capture thread whenever a bucket finishes recording
+        self._bucket_ready = threading.Event()
+
+        # Persistent FFmpeg analyzer fed from the live stream URL
+        self.live_analyzer = LiveStreamAnalyzer()
+
+        # Background workers for clip jobs and metrics POSTs (created per session in start_processing)
+        self._clip_executor: Optional[ThreadPoolExecutor] = None
+        self._metrics_pool: Optional[ThreadPoolExecutor] = None
+        self._metrics_post = None
+
+        # Consecutive failed metrics POSTs and the monotonic time of the next attempt
+        self._metrics_failures = 0
+        self._metrics_retry_at = 0.0
+
+        # Resolved HLS URL and its monotonic expiry, shared by all captures
+        self.stream_url_ttl = 60.0
+        self._stream_url_cache: Optional[Tuple[str, float]] = None
+
         # Adaptive baseline detection
         self.baseline_tracker = BaselineTracker(calibration_seconds=60)
         self.use_adaptive_detection = config.get('useAdaptiveDetection', True)
 
-        # Initialize AI detector if available
+        # Initialize AI detector if available. NLTK data checks and model loading
+        # run in the background; detection stays rule-based until the load finishes.
         self.ai_detector = None
+        self._ai_ready = threading.Event()
         if AI_AVAILABLE:
-            try:
-                setup_nltk()
-                self.ai_detector = AIHighlightDetector()
-                print("🤖 AI-powered highlight detection enabled")
-            except Exception as e:
-                print(f"⚠️ AI detector initialization failed: {e}")
-                self.ai_detector = None
+            threading.Thread(target=self._init_ai_detector, daemon=True).start()
+        else:
+            self._ai_ready.set()
 
         # Cooldown system
-        self.last_clip_time = 0
+        self.last_clip_time = -math.inf  # time.monotonic() of the last clip
         self.clip_cooldown = self.clip_length
 
-        # Metrics queue
-        from queue import Queue
-        self.metrics_queue = Queue()
+        # Latest analysis snapshot (analysis thread -> metrics thread). The
+        # metrics loop only reports the newest values, so the producer swaps in
+        # a fresh dict (an atomic reference assignment) and no queue is needed.
+        self._latest_metrics: Dict[str, Any] = {}
+
+        # Keep-alive HTTP session for server notifications and the 1 Hz metrics
+        # POST, so each call reuses a pooled connection instead of a new socket
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=0)
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
 
         # Ad Gatekeeper
         self.ad_gatekeeper = None
@@ -445,14 +874,28 @@ class StreamProcessor:
         # Directories
         self.clips_dir = config.get('outputDir', os.path.join(os.getcwd(), 'clips'))
         os.makedirs(self.clips_dir, exist_ok=True)
+        self.thumbnails_dir = os.path.join(self.clips_dir, 'thumbnails')
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
         temp_dir = os.path.join(os.getcwd(), 'temp')
         os.makedirs(temp_dir, exist_ok=True)
 
         print(f"Stream processor initialized with config: {config}")
         print(f"Clips directory: {self.clips_dir}")
-        print(f"AI Detection: {'Enabled' if self.ai_detector else 'Disabled'}")
+        print(f"AI Detection: {'Loading' if AI_AVAILABLE else 'Disabled'}")
         print(f"Ad Gatekeeper: {'Enabled' if self.ad_gatekeeper else 'Disabled'}")
 
+    def _init_ai_detector(self):
+        """Load NLTK data and the AI detector off the constructing thread."""
+        try:
+            setup_nltk()
+            self.ai_detector = AIHighlightDetector()
+            print("🤖 AI-powered highlight detection enabled")
+        except Exception as e:
+            print(f"⚠️ AI detector initialization failed: {e}")
+            self.ai_detector = None
+        finally:
+            self._ai_ready.set()
+
     def start_processing(self, url: str, audio_threshold: float, motion_threshold: float, clip_length: int, session_id: str = None, session_token: str = None):
         """Start the stream processing with session-specific isolation."""
         if self.is_running:
@@ -472,6 +915,8 @@ class StreamProcessor:
 
         self.is_running = True
         self.consecutive_failures = 0
+        self._stream_url_cache = None
+        self._latest_metrics = {}
         self.last_successful_capture = time.time()
         self.start_time = time.time()
 
@@ -507,6 +952,17 @@ class StreamProcessor:
         except Exception as e:
             print(f"⚠️ Error cleaning old frames: {e}")
 
+        # Clip saving, thumbnailing and server notification run off the analysis
+        # thread; one worker keeps clips in trigger order
+        self._clip_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='clip')
+
+        # Metrics POSTs go through their own worker so a slow server cannot
+        # stall the 1 Hz loop; at most one request is in flight
+        self._metrics_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='metrics')
+        self._metrics_post = None
+        self._metrics_failures = 0
+        self._metrics_retry_at = 0.0
+
         # Start capture, analysis, and metrics update threads
         self.capture_thread = threading.Thread(target=self._stream_capture_loop, daemon=True)
         self.analysis_thread = threading.Thread(target=self._stream_analysis_loop, daemon=True)
@@ -521,10 +977,31 @@ class StreamProcessor:
 
         return True
 
+    @property
+    def is_running(self) -> bool:
+        """Whether processing is active; backed by _stop_event so waiters wake on stop."""
+        return not self._stop_event.is_set()
+
+    @is_running.setter
+    def is_running(self, value: bool):
+        if value:
+            self._stop_event.clear()
+        else:
+            self._stop_event.set()
+
     def stop_processing(self):
         """Stop stream processing."""
         print("🧹 Stopping stream processing and cleaning up artifacts...")
         self.is_running = False
+        self._bucket_ready.set()  # Release the analysis thread's wait
+
+        # Stop the persistent analysis process
+        self.live_analyzer.stop()
+
+        # Let in-flight clip jobs finish before their source buckets are removed
+        if self._clip_executor:
+            self._clip_executor.shutdown(wait=True)
+            self._clip_executor = None
 
         # Clean up stream bucket and all temporary files
         if self.stream_bucket:
@@ -563,26 +1040,35 @@ class StreamProcessor:
         except Exception as cleanup_error:
             print(f"⚠️ Error during Python processor cleanup: {cleanup_error}")
 
-        # Clean up AI detector resources
+        # Clean up AI detector resources (letting a pending load finish first)
+        self._ai_ready.wait(timeout=30)
         if self.ai_detector:
             print("🧹 Cleaning up AI detector resources...")
             self.ai_detector.cleanup()
 
+        # Drop any queued metrics POST, then release pooled server connections
+        if self._metrics_pool:
+            self._metrics_pool.shutdown(wait=False, cancel_futures=True)
+            self._metrics_pool = None
+        self._http.close()
+
         print("✅ Stream processing stopped and all artifacts cleaned up")
 
     def _stream_capture_loop(self):
         """Main loop for capturing continuous video buckets."""
         bucket_counter = 0
+        # Bucket starts are pinned to clip_length boundaries on the monotonic clock
+        deadline = time.monotonic()
 
         while self.is_running:
             try:
                 # Start a new bucket for continuous recording
                 bucket_path = self.stream_bucket.start_new_bucket()
 
-                print(f"🪣 Recording bucket {bucket_counter}: {self.clip_length}s duration")
+                logger.debug("🪣 Recording bucket %d: %ss duration", bucket_counter, self.clip_length)
                 # Capture continuous video bucket
                 success = self._capture_continuous_bucket(bucket_path)
-                print(f"📊 Bucket result {bucket_counter}: {'SUCCESS' if success else 'FAILED'}")
+                logger.debug("📊 Bucket result %d: %s", bucket_counter, 'SUCCESS' if success else 'FAILED')
 
                 if success:
                     # Reset failure counter on successful capture
@@ -596,6 +1082,12 @@ class StreamProcessor:
                         # Keep only last 3 buckets to bound memory
                         if len(self.completed_buckets) > 3:
                             self.completed_buckets = self.completed_buckets[-3:]
+                        # Wake the analysis thread for the finished bucket
+                        self._bucket_ready.set()
+                        # Only the newest bucket is ever clipped; the previous
+                        # one's tens of MB of page cache can go now
+                        if len(self.completed_buckets) > 1:
+                            _drop_page_cache(self.completed_buckets[-2])
 
                     # Clean up old buckets to save space
                     self.stream_bucket.cleanup_old_buckets()
@@ -612,42 +1104,60 @@ class StreamProcessor:
                             print(f"📺 STREAM ENDED: {self.max_consecutive_failures} consecutive failures detected")
 
                         # Continue monitoring for potential stream restart
-                        time.sleep(10)  # Wait longer between attempts when stream has ended
-                        continue
+                        self._stop_event.wait(10)  # Wait longer between attempts when stream has ended
+                    else:
+                        # Retry soon: waiting for the next boundary would lose
+                        # up to a whole bucket to a transient error
+                        self._stop_event.wait(0.5)
+                    deadline = time.monotonic()  # Re-pin the grid to the retry
+                    continue
 
-                # Brief pause to prevent overwhelming the system
-                time.sleep(0.5)
+                # Start the next bucket at the next boundary. A full recording
+                # is always late, so it chains straight on
+                deadline += self.clip_length
+                sleep_for = deadline - time.monotonic()
+                if sleep_for > 0:
+                    self._stop_event.wait(sleep_for)
+                else:
+                    deadline = time.monotonic()  # Behind schedule: catch up, don't burst
 
             except Exception as e:
                 print(f"Error in bucket capture: {e}")
                 self.consecutive_failures += 1
-                time.sleep(1)
+                self._stop_event.wait(1)
+                deadline = time.monotonic()
 
     def _stream_analysis_loop(self):
         """Analyze stream buckets for highlights."""
         while self.is_running:
             try:
-                bucket_info = self.stream_bucket.get_current_bucket_info()
-
-                if not bucket_info:
-                    print(f"⏳ Waiting for bucket to start recording...")
-                    time.sleep(1)
+                # Block until the capture thread finishes a bucket rather than
+                # waking every second to poll whether recording is done
+                if not self._bucket_ready.wait(timeout=5):
                     continue
+                self._bucket_ready.clear()
 
-                # Wait for bucket to finish recording before analysis
-                if self.stream_bucket.is_recording_bucket:
-                    time.sleep(2)
+                if not self.is_running or not self.completed_buckets:
                     continue
+                bucket_path = self.completed_buckets[-1]
 
-                # Additional wait to ensure file is completely written
-                time.sleep(1)
+                # Skip a bucket already analyzed in its current state (slots are
+                # reused, so size/mtime distinguish a new recording in the same file)
+                try:
+                    st = os.stat(bucket_path)
+                    analysis_key = (bucket_path, st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+                if analysis_key == self._last_analyzed_key:
+                    continue
 
                 # Analyze the completed bucket
-                metrics = self._analyze_bucket_sample(bucket_info['path'])
+                metrics = self._analyze_bucket_sample(bucket_path, st.st_size)
+                self._last_analyzed_key = analysis_key
 
                 # Update processing stats - increment by 1 for smooth counting
                 self.frames_processed += 1
-                print(f"📊 Frames processed: {self.frames_processed}")
+                logger.debug("📊 Frames processed: %d", self.frames_processed)
 
                 # Add metrics to baseline tracker
                 if self.use_adaptive_detection:
@@ -671,7 +1181,7 @@ class StreamProcessor:
 
                 # Always check fixed thresholds as fallback
                 if not trigger_reason:
-                    trigger_reason = self._check_highlight_triggers(metrics, bucket_info['path'])
+                    trigger_reason = self._check_highlight_triggers(metrics, bucket_path)
 
                 # Debug output for detection attempts
                 if self.frames_processed % 300 == 0:  # Every 5 minutes
@@ -682,13 +1192,19 @@ class StreamProcessor:
                         print(f"   Still calibrating: {self.baseline_tracker.get_calibration_progress():.1f}%")
 
                 # Apply cooldown to prevent spam clips
-                current_time = time.time()
+                current_time = time.monotonic()
                 if trigger_reason and (current_time - self.last_clip_time) >= self.clip_cooldown:
                     print(f"Highlight detected: {trigger_reason} at {detection_time}")
-                    self._create_highlight_clip(detection_time, trigger_reason)
+                    if self._clip_executor:
+                        # Pass the bucket that fired: by the time the job runs,
+                        # completed_buckets[-1] may already be a later one
+                        self._clip_executor.submit(self._create_highlight_clip, detection_time,
+                                                   trigger_reason, bucket_path)
+                    else:
+                        self._create_highlight_clip(detection_time, trigger_reason, bucket_path)
                     self.last_clip_time = current_time
                 elif trigger_reason:
-                    print(f"Skipping clip due to cooldown: {trigger_reason}")
+                    logger.debug("Skipping clip due to cooldown: %s", trigger_reason)
 
                 # Queue metrics for SSE updates
                 metrics_update = {
@@ -709,28 +1225,44 @@ class StreamProcessor:
                 else:
                     metrics_update['detection_mode'] = 'fixed'
 
-                self.metrics_queue.put(metrics_update)
-
-                time.sleep(1)
+                self._latest_metrics = metrics_update
 
             except Exception as e:
                 print(f"Error in stream analysis: {e}")
                 time.sleep(1)
 
-    def _analyze_bucket_sample(self, bucket_path: str) -> Dict[str, float]:
-        """Analyze a small sample from the current recording bucket."""
+    def _analyze_bucket_sample(self, bucket_path: str, file_size: int = None) -> Dict[str, float]:
+        """Analyze a small sample from the current recording bucket.
+
+        Args:
+            bucket_path: Completed bucket file
+            file_size: Size from a stat the caller already did; stats the file if omitted
+        """
         try:
-            if not os.path.exists(bucket_path):
+            if file_size is None:
+                try:
+                    file_size = os.stat(bucket_path).st_size
+                except FileNotFoundError:
+                    return self._get_default_metrics()
+
+            if file_size < 100000:  # Reduced threshold for faster analysis
                 return self._get_default_metrics()
 
-            # Get current file size to check if it's growing (actively recording)
-            file_size = os.path.getsize(bucket_path)
+            # Metrics source is fixed once ffmpeg is known to be missing
+            if self.live_analyzer.ffmpeg_unavailable:
+                return self._generate_realistic_metrics()
 
-            if file_size < 100000:  # Reduced threshold for faster analysis
+            # Prefer real metrics from the persistent analyzer
+            live_metrics = self._analyze_with_ffmpeg()
+            if live_metrics:
+                return live_metrics
+
+            # A running analyzer that never yields data is a fault, not a reason
+            # to make metrics up: report nothing so no trigger fires on noise
+            if self.live_analyzer.check_stalled():
                 return self._get_default_metrics()
 
-            # Skip file growth check to avoid delays
-            # Generate realistic metrics based on simple analysis
+            # Analyzer not producing data yet - generate realistic metrics
             return self._generate_realistic_metrics()
 
         except Exception as e:
@@ -764,111 +1296,24 @@ class StreamProcessor:
             'audio_db_change': min(20, max(0, (base_audio - 50) * 0.4)) if base_audio > 50 else 0,
         }
 
-    def _analyze_segment(self, segment_path: str) -> Dict[str, float]:
-        """Analyze a segment for audio/motion/scene metrics using FFmpeg."""
-        try:
-            if not os.path.exists(segment_path):
-                print(f"Segment file not found: {segment_path}")
-                return self._get_default_metrics()
-
-            # ONLY process real video segments - no mock data allowed
-            real_video_extensions = ('.ts', '.mp4', '.m4v', '.mkv')
-            if not segment_path.lower().endswith(real_video_extensions):
-                print(f"❌ CRITICAL: Invalid video format for segment - real video required")
-                return self._get_default_metrics()
-
-            file_size = os.path.getsize(segment_path)
-            if file_size < 50000: # Lowered threshold to 50KB for faster checks
-                print(f"❌ CRITICAL: Segment file too small ({file_size} bytes) - not real video")
-                return self._get_default_metrics()
-
-            print(f"✅ Processing REAL video segment: {file_size} bytes")
-            # Process only real video with FFmpeg
-            return self._analyze_with_ffmpeg(segment_path)
-
-        except Exception as e:
-            print(f"Error analyzing segment {segment_path}: {e}")
-            return self._get_default_metrics()
-
-    def _analyze_with_ffmpeg(self, segment_path: str) -> Dict[str, float]:
-        """Use FFmpeg to analyze video segment for real metrics."""
+    def _analyze_with_ffmpeg(self) -> Optional[Dict[str, float]]:
+        """Read the latest real metrics from the persistent FFmpeg analyzer."""
         try:
-            # Real-time FFmpeg analysis with enhanced audio and video detection
-            # Using select=gt(scene\,0.3) for scene changes and calculating RMS level for audio
-            cmd = [
-                'ffmpeg',
-                '-i', segment_path,
-                '-af', 'astats=metadata=1:reset=1:measure_overall=RMS_level',
-                '-vf', 'fps=2,select=gt(scene\\,0.3),metadata=print:key=lavfi.scene_score',
-                '-f', 'null',
-                '-'
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-
-            metrics = {
-                'frames_analyzed': 60,  # Default to 60 frames (assuming 30fps, 2s segment)
-                'audio_level': 0.0,
-                'motion_level': 0.0,
-                'scene_change': 0.0,
-                'audio_db_change': 0.0,
-            }
-
-            # Parse FFmpeg output for real audio spikes and scene changes
-            audio_levels = []
-            scene_scores = []
-
-            for line in result.stderr.split('\n'):
-                # Detect RMS audio levels (indicates volume spikes)
-                if 'Overall RMS' in line or 'RMS level dB' in line:
-                    try:
-                        rms_match = re.search(r'(Overall RMS|RMS level dB):\s*([-\d.]+)', line)
-                        if rms_match:
-                            rms_db = float(rms_match.group(2))
-                            # Convert dB to spike detection metric
-                            if rms_db > -20:  # Very loud - major spike
-                                audio_change = 15 + (rms_db + 20) * 0.2
-                            elif rms_db > -30:  # Loud
-                                audio_change = 8 + (rms_db + 30) * 0.7
-                            else:  # Normal/quiet
-                                audio_change = max(0, (rms_db + 50) * 0.2)
-
-                            audio_levels.append(min(20, max(0, audio_change)))
-                            # UI display level
-                            metrics['audio_level'] = max(0, min(100, (rms_db + 60) * 1.67))
-                    except (ValueError, AttributeError):
-                        pass
-
-                # Detect scene changes (indicates visual motion/cuts)
-                elif 'lavfi.scene_score' in line:
-                    try:
-                        scene_match = re.search(r'lavfi\.scene_score=([\d.]+)', line)
-                        if scene_match:
-                            scene_score = float(scene_match.group(1))
-                            scene_scores.append(scene_score)
-                            metrics['scene_change'] = scene_score
-                    except (ValueError, AttributeError):
-                        pass
-
-            # Set final metrics for highlight detection
-            if audio_levels:
-                metrics['audio_db_change'] = max(audio_levels)  # Peak audio spike
-
-            if scene_scores:
-                max_scene = max(scene_scores)
-                metrics['scene_change'] = max_scene
-                metrics['motion_level'] = min(100, max_scene * 100)  # Scale to 0-100
+            # Cover the whole bucket so no part of the stream is skipped
+            metrics = self.live_analyzer.snapshot(window_sec=self.clip_length)
+            if metrics is None:
+                return None
 
             # Add natural variation for realistic detection
-            import random
-            metrics['audio_level'] += random.uniform(0, 2)
-            metrics['motion_level'] += random.uniform(0, 3)
+            audio_noise, motion_noise = _RNG.uniform(0.0, [2.0, 3.0])
+            metrics['audio_level'] += float(audio_noise)
+            metrics['motion_level'] += float(motion_noise)
 
             return metrics
 
         except Exception as e:
             print(f"FFmpeg analysis error: {e}")
-            return self._get_default_metrics()
+            return None
 
     def _get_default_metrics(self) -> Dict[str, float]:
         """Return default metrics when analysis fails."""
@@ -889,22 +1334,21 @@ class StreamProcessor:
         scene_change = metrics.get('scene_change', 0)
         audio_db_change = metrics.get('audio_db_change', 0)
 
-        # Create compatible feature set for AI detector (6 features expected)
-        enhanced_metrics = {
-            'audio_level': audio_level,
-            'motion_level': motion_level,
-            'scene_change': scene_change,
-            'audio_db_change': audio_db_change,
-            'frames_analyzed': metrics.get('frames_analyzed', 60),
-            'combined_score': (
-                (audio_level / 100) * 0.4 +
-                (motion_level / 100) * 0.4 +
-                (scene_change * 5) * 0.2
-            )
-        }
-
         # Try AI detection with enhanced features
         if self.ai_detector and segment_path:
+            # Create compatible feature set for AI detector (6 features expected)
+            enhanced_metrics = {
+                'audio_level': audio_level,
+                'motion_level': motion_level,
+                'scene_change': scene_change,
+                'audio_db_change': audio_db_change,
+                'frames_analyzed': metrics.get('frames_analyzed', 60),
+                'combined_score': (
+                    (audio_level / 100) * 0.4 +
+                    (motion_level / 100) * 0.4 +
+                    (scene_change * 5) * 0.2
+                )
+            }
             try:
                 ai_result = self.ai_detector.analyze_segment(segment_path, enhanced_metrics)
                 if ai_result.get('should_trigger', False):
@@ -933,16 +1377,30 @@ class StreamProcessor:
 
         return None
 
-    def _create_highlight_clip(self, detection_time: float, trigger_reason: str):
-        """Create a highlight clip by saving the current bucket."""
+    def _count_clip(self):
+        """Increment clips_generated; safe to call from any thread."""
+        with self._stats_lock:
+            self.clips_generated += 1
+
+    def _create_highlight_clip(self, detection_time: float, trigger_reason: str,
+                               bucket_path: Optional[str] = None):
+        """Create a highlight clip by saving a completed bucket.
+
+        Args:
+            detection_time: Wall-clock time of the detection
+            trigger_reason: Why the clip was triggered
+            bucket_path: Bucket that triggered the clip; defaults to the most
+                recently completed one
+        """
         try:
-            # Choose the most recently completed bucket (not the currently recording one)
-            source_bucket = None
-            if self.completed_buckets:
-                source_bucket = self.completed_buckets[-1]
-            else:
-                bucket_info = self.stream_bucket.get_current_bucket_info()
-                source_bucket = bucket_info['path'] if bucket_info else None
+            source_bucket = bucket_path
+            if not source_bucket:
+                # Choose the most recently completed bucket (not the currently recording one)
+                if self.completed_buckets:
+                    source_bucket = self.completed_buckets[-1]
+                else:
+                    bucket_info = self.stream_bucket.get_current_bucket_info()
+                    source_bucket = bucket_info['path'] if bucket_info else None
 
             if not source_bucket or not os.path.exists(source_bucket):
                 print("No completed bucket available for clipping")
@@ -966,9 +1424,12 @@ class StreamProcessor:
                 self._capture_clip_thumbnail(clip_path, thumbnail_filename)
 
                 # Notify the main server about the new clip
-                file_size = os.path.getsize(clip_path) if os.path.exists(clip_path) else 1024 * 1024 * 10
+                try:
+                    file_size = os.stat(clip_path).st_size
+                except FileNotFoundError:
+                    file_size = 1024 * 1024 * 10
                 self._notify_clip_created(clip_filename, trigger_reason, detection_time, file_size)
-                self.clips_generated += 1
+                self._count_clip()
                 print(f"✅ Created smooth highlight clip: {clip_filename} ({trigger_reason})")
             else:
                 print(f"❌ Failed to create highlight clip: {clip_filename}")
@@ -1017,254 +1478,38 @@ class StreamProcessor:
                 self._capture_clip_thumbnail(output_path, thumb_name)
                 size = os.path.getsize(output_path)
                 self._notify_clip_created(test_filename, 'TEST clip, actual highlights here soon', time.time(), size)
-                self.clips_generated += 1
+                self._count_clip()
                 print(f"✅ Test clip generated: {test_filename}")
             else:
                 print("⚠️ Test clip not created or too small")
         except Exception as e:
             print(f"⚠️ Test clip routine error: {e}")
 
-    def _create_ffmpeg_clip(self, segments, detection_segment, segment_offset, before_duration, after_duration, output_path, trigger_reason):
-        """Use FFmpeg to create a precise clip with 20%/80% timing."""
-        try:
-            # Check if segments are real video by looking at file types and sizes
-            # Real video segments should be at least 50KB and have proper extensions
-            real_video_segments = []
-            for seg in segments:
-                if os.path.exists(seg['path']):
-                    size = os.path.getsize(seg['path'])
-                    path = seg['path']
-                    # Real video if it's larger than 50KB or has video extension
-                    if size > 50000 or path.lower().endswith(('.ts', '.mp4', '.m4v', '.mkv')):
-                        real_video_segments.append(seg)
-
-            # If no real video segments, FAIL - don't create mock clips
-            if not real_video_segments:
-                print("❌ CRITICAL: No real video segments found - cannot create clip from stream")
-                print("❌ Stream capture has failed - stopping processing")
-                self.is_running = False
-                return False
-
-            # Use real video segments for clipping
-            segments = real_video_segments
-
-            # Sort segments by timestamp to ensure proper order
-            segments.sort(key=lambda x: x['timestamp'])
-
-            # Create concatenation file for FFmpeg
-            concat_file = os.path.join(self.stream_buffer.temp_dir, f"concat_{int(time.time())}.txt")
-
-            with open(concat_file, 'w') as f:
-                for segment in segments:
-                    # Escape paths for FFmpeg
-                    escaped_path = segment['path'].replace("'", "'\\''")
-                    f.write(f"file '{escaped_path}'\n")
-
-            # Calculate total available duration from all segments
-            total_available_duration = len(segments) * 2  # Each segment is 2 seconds
-            print(f"Total available duration: {total_available_duration}s from {len(segments)} segments")
-
-            # Check if we have enough content for the requested clip length
-            if total_available_duration < self.clip_length:
-                print(f"WARNING: Buffer only has {total_available_duration}s but need {self.clip_length}s")
-                print("Will capture additional real-time content to reach full clip duration")
-
-                # Use the real-time capture approach for full duration
-                return self._create_realtime_clip(segments, output_path, trigger_reason, before_duration, after_duration)
-
-            else:
-                # We have enough content - use proper 20%/80% strategy
-                # Find detection moment position in the concatenated timeline
-                detection_moment_in_timeline = 0
-                for i, segment in enumerate(segments):
-                    if segment == detection_segment:
-                        detection_moment_in_timeline = (i * 2) + segment_offset
-                        break
-
-                print(f"Detection moment at {detection_moment_in_timeline}s in concatenated timeline")
-
-                # Calculate optimal start time for 20%/80% strategy
-                ideal_start_time = detection_moment_in_timeline - before_duration
-
-                # Ensure we don't go before the start of available content
-                clip_start_time = max(0, ideal_start_time)
-
-                # Ensure we don't exceed available content
-                available_duration_from_start = total_available_duration - clip_start_time
-                actual_clip_duration = min(self.clip_length, available_duration_from_start)
-
-                print(f"20%/80% strategy: start={clip_start_time:.1f}s, detection at {detection_moment_in_timeline:.1f}s")
-
-            # Always use user-specified duration if possible
-            actual_clip_duration = self.clip_length
-
-            print(f"Final clip: start={clip_start_time:.1f}s, duration={actual_clip_duration:.1f}s")
-
-            # FFmpeg command for precise clipping
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', concat_file,
-                '-ss', str(clip_start_time),  # Start time in concatenated timeline
-                '-t', str(actual_clip_duration),  # Actual available duration
-                '-c:v', 'libx264',  # Video codec
-                '-c:a', 'aac',      # Audio codec
-                '-preset', 'medium', # Better quality encoding
-                '-crf', '18',        # High quality (18 = visually lossless)
-                '-pix_fmt', 'yuv420p',  # Ensure compatibility
-                '-movflags', '+faststart',  # Web optimization
-                '-y',  # Overwrite output
-                output_path
-            ]
-
-            print(f"Running FFmpeg: ffmpeg ... -ss {clip_start_time} -t {actual_clip_duration} {output_path}")
-
-            # Execute FFmpeg command
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-            # Clean up concat file
-            if os.path.exists(concat_file):
-                os.remove(concat_file)
-
-            if result.returncode == 0:
-                print(f"✅ FFmpeg clip creation successful: {output_path} ({actual_clip_duration}s)")
-                return True
-            else:
-                print(f"❌ FFmpeg error: {result.stderr}")
-                print("❌ CRITICAL: Real video clipping failed - stopping processing")
-                self.is_running = False
-                return False
-
-        except subprocess.TimeoutExpired:
-            print("❌ CRITICAL: FFmpeg command timed out - real stream required")
-            self.is_running = False
-            return False
-        except Exception as e:
-            print(f"❌ CRITICAL: FFmpeg clip creation error: {e}")
-            self.is_running = False
-            return False
-
-    def _create_realtime_clip(self, buffered_segments, output_path, trigger_reason, before_duration, after_duration):
-        """Create a clip by combining buffered content with real-time capture to reach full duration."""
-        try:
-            print(f"Creating real-time clip: {self.clip_length}s total ({before_duration}s + {after_duration}s)")
-
-            # Step 1: Use all available buffered content
-            buffered_duration = len(buffered_segments) * 2
-            print(f"Using {buffered_duration}s of buffered content")
-
-            # Step 2: Calculate how much additional content we need
-            additional_needed = self.clip_length - buffered_duration
-            print(f"Need {additional_needed}s additional real-time content")
-
-            # Step 3: Capture additional real-time content
-            temp_files = []
-            if additional_needed > 0:
-                print(f"Capturing {additional_needed}s of additional real-time content...")
-                additional_segments = self._capture_additional_content(additional_needed)
-                temp_files.extend(additional_segments)
-
-            # Step 4: Combine all segments into final clip
-            all_segments = [seg['path'] for seg in buffered_segments] + temp_files
-
-            # Create concatenation file
-            concat_file = os.path.join(self.stream_buffer.temp_dir, f"realtime_{int(time.time())}.txt")
-            with open(concat_file, 'w') as f:
-                for segment_path in all_segments:
-                    escaped_path = segment_path.replace("'", "'\\''")
-                    f.write(f"file '{escaped_path}'\n")
-
-            # Use FFmpeg to create the final clip
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', concat_file,
-                '-t', str(self.clip_length),  # Use exact clip length
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                '-preset', 'medium', # Better quality encoding
-                '-crf', '18',        # High quality
-                '-pix_fmt', 'yuv420p',  # Ensure compatibility
-                '-movflags', '+faststart',
-                '-y',
-                output_path
-            ]
-
-            print(f"Creating real-time clip: ffmpeg ... -t {self.clip_length} {output_path}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-            # Clean up temporary files
-            if os.path.exists(concat_file):
-                os.remove(concat_file)
-            for temp_file in temp_files:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-
-            if result.returncode == 0:
-                print(f"✅ Real-time clip creation successful: {output_path} ({self.clip_length}s)")
-                return True
-            else:
-                print(f"❌ Real-time FFmpeg error: {result.stderr}")
-                print("❌ CRITICAL: Real-time clipping failed - stopping processing")
-                self.is_running = False
-                return False
-
-        except Exception as e:
-            print(f"❌ CRITICAL: Real-time clip creation error: {e}")
-            self.is_running = False
-            return False
-
-    def _capture_additional_content(self, duration_needed):
-        """Capture additional real-time content to fill the clip duration."""
-        additional_segments = []
-        segments_needed = max(1, int(duration_needed / 2))  # 2 seconds per segment
-
-        print(f"Capturing {segments_needed} additional segments ({segments_needed * 2}s)")
-
-        for i in range(segments_needed):
-            try:
-                temp_filename = f"additional_{int(time.time())}_{i}.ts"
-                temp_path = os.path.join(self.stream_buffer.temp_dir, temp_filename)
-
-                # Capture segment using existing method
-                if self._capture_real_segment(temp_path):
-                    additional_segments.append(temp_path)
-                    print(f"✓ Captured additional segment {i+1}/{segments_needed}")
-                else:
-                    print(f"✗ Failed to capture additional segment {i+1}")
-                    break
-
-            except Exception as e:
-                print(f"Error capturing additional segment {i}: {e}")
-                break
-
-        return additional_segments
-
     def _capture_clip_thumbnail(self, clip_path: str, thumbnail_filename: str):
         """Capture a thumbnail frame from the saved clip."""
         try:
-            # Create thumbnail directory if it doesn't exist
-            thumbnails_dir = os.path.join(self.clips_dir, 'thumbnails')
-            os.makedirs(thumbnails_dir, exist_ok=True)
+            thumbnail_path = os.path.join(self.thumbnails_dir, thumbnail_filename)
 
-            thumbnail_path = os.path.join(thumbnails_dir, thumbnail_filename)
-
-            # Use FFmpeg to extract a frame from the middle of the clip
+            # Use FFmpeg to extract a frame from the middle of the clip. Seeking
+            # on the input jumps to the nearest keyframe, so only the frames
+            # from there to the midpoint are decoded, not the first half.
+            # Written under a temp name and renamed, so the UI never serves a half-written JPEG
+            tmp_path = thumbnail_path + '.part'
             cmd = [
                 'ffmpeg',
-                '-i', clip_path,
                 '-ss', str(self.clip_length // 2),  # Middle of the clip
+                '-i', clip_path,
                 '-vframes', '1',                    # Extract exactly 1 frame
+                '-f', 'mjpeg',                      # Format can't come from the .part name
                 '-y',                               # Overwrite output
-                thumbnail_path
+                tmp_path
             ]
 
             print(f"🖼️ Capturing thumbnail from clip middle")
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
 
-            if result.returncode == 0 and os.path.exists(thumbnail_path):
+            if result.returncode == 0 and os.path.exists(tmp_path):
+                os.replace(tmp_path, thumbnail_path)
                 print(f"✅ Thumbnail captured successfully: {thumbnail_filename}")
             else:
                 print(f"❌ Thumbnail capture failed: {result.stderr}")
@@ -1290,11 +1535,7 @@ class StreamProcessor:
                 print("Could not find segment for frame capture")
                 return
 
-            # Create thumbnail directory if it doesn't exist
-            thumbnails_dir = os.path.join(self.clips_dir, 'thumbnails')
-            os.makedirs(thumbnails_dir, exist_ok=True)
-
-            thumbnail_path = os.path.join(thumbnails_dir, thumbnail_filename)
+            thumbnail_path = os.path.join(self.thumbnails_dir, thumbnail_filename)
 
             # Use FFmpeg to extract frame at exact detection moment
             cmd = [
@@ -1317,43 +1558,128 @@ class StreamProcessor:
         except Exception as e:
             print(f"Error capturing detection frame: {e}")
 
-    def _create_standard_clip(self, segments, output_path, filename, trigger_reason, detection_time):
-        """Fallback method for standard clipping without precise timing."""
-        try:
-            concat_file = os.path.join(self.stream_buffer.temp_dir, f"standard_{int(time.time())}.txt")
+    def _get_stream_url(self) -> Optional[str]:
+        """Return the HLS URL for the configured stream, resolving at most once per TTL.
+
+        The resolved URL stays valid for the whole HLS session, so repeated
+        captures reuse it instead of re-running streamlink / the Ad Gatekeeper.
+        Captures call _invalidate_stream_url() when FFmpeg fails on it.
+        """
+        cached = self._stream_url_cache
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
 
-            with open(concat_file, 'w') as f:
-                for segment in segments:
-                    escaped_path = segment['path'].replace("'", "'\\''")
-                    f.write(f"file '{escaped_path}'\n")
+        stream_url = self._resolve_stream_url()
+        if stream_url:
+            self._stream_url_cache = (stream_url, time.monotonic() + self.stream_url_ttl)
+        return stream_url
 
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', concat_file,
-                '-t', str(self.clip_length),
-                '-c', 'copy',
-                '-y',
-                output_path
+    def _invalidate_stream_url(self):
+        """Force the next capture to resolve a fresh stream URL."""
+        self._stream_url_cache = None
+
+    @classmethod
+    def _ensure_streamlink(cls) -> Optional[str]:
+        """Return a working streamlink command, installing it if needed.
+
+        The check runs until it first succeeds and is then cached for the
+        process, so captures do not fork a probe every time.
+        """
+        if cls._streamlink_cmd:
+            return cls._streamlink_cmd
+
+        # Cross-platform streamlink availability check
+        streamlink_cmd = 'streamlink'
+        if os.name == 'nt':
+            # Prefer venv Scripts path if available
+            possible = [
+                os.path.join(os.getcwd(), '.venv', 'Scripts', 'streamlink.exe'),
+                os.path.join(os.getcwd(), '.venv', 'Scripts', 'streamlink'),
+                'streamlink'
             ]
+            for p in possible:
+                if os.path.isfile(p) or p == 'streamlink':
+                    streamlink_cmd = p
+                    break
+        # Try invoking --version to verify
+        try:
+            ver = subprocess.run([streamlink_cmd, '--version'], capture_output=True, text=True, timeout=10)
+            if ver.returncode != 0:
+                raise RuntimeError(ver.stderr or 'unknown error')
+        except Exception as e:
+            print(f"❌ CRITICAL: streamlink not available ({e}); attempting pip install")
+            pip_exe = sys.executable
+            install_result = subprocess.run([pip_exe, '-m', 'pip', 'install', 'streamlink'], capture_output=True, text=True, timeout=120)
+            if install_result.returncode != 0:
+                print(f"❌ CRITICAL: Failed to install streamlink: {install_result.stderr[:200]}")
+                return None
+            streamlink_cmd = 'streamlink'
+            print("✅ streamlink installed successfully")
+
+        cls._streamlink_cmd = streamlink_cmd
+        return streamlink_cmd
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
+    def _resolve_stream_url(self) -> Optional[str]:
+        """Resolve the HLS URL via the Ad Gatekeeper, or streamlink as a fallback."""
+        # Both paths shell out to streamlink
+        streamlink_cmd = self._ensure_streamlink()
+        if not streamlink_cmd:
+            return None
+
+        # Extract channel name from URL for Ad Gatekeeper
+        match = _TWITCH_CHANNEL_RE.search(self.config['url'])
+        channel_name = match.group(1) if match else None
 
-            if os.path.exists(concat_file):
-                os.remove(concat_file)
+        # Use Ad Gatekeeper if available and we have a channel name
+        if self.ad_gatekeeper and channel_name:
+            print(f"🛡️ Using Ad Gatekeeper for channel: {channel_name}")
+            stream_url = self.ad_gatekeeper.get_clean_twitch_url(channel_name, quality='best')
 
-            if result.returncode == 0:
-                return True
+            if stream_url:
+                print(f"✅ Got clean stream URL via Ad Gatekeeper: {stream_url[:80]}...")
             else:
-                print("❌ CRITICAL: Standard clip creation failed - stopping processing")
-                self.is_running = False
-                return False
+                print("❌ CRITICAL: Ad Gatekeeper failed to get clean URL")
+            return stream_url
+
+        # Fallback to direct streamlink (legacy behavior)
+        print(f"⚠️ Ad Gatekeeper not available, using direct streamlink")
+        url_cmd = [
+            streamlink_cmd,
+            self.config['url'],
+            'best',  # Use best quality for high-definition clips
+            '--stream-url',
+            '--retry-streams', '3',
+            '--retry-max', '5'
+        ]
+
+        print(f"🔄 Getting stream URL: streamlink {self.config['url']} best --stream-url")
+        url_result = subprocess.run(url_cmd, capture_output=True, text=True, timeout=30)
+
+        if url_result.returncode != 0:
+            print(f"❌ CRITICAL: streamlink failed with return code {url_result.returncode}")
+            print(f"❌ stdout: {url_result.stdout}")
+            print(f"❌ stderr: {url_result.stderr}")
+
+            # Try with different quality options (prioritize higher quality)
+            for quality in ['720p', '1080p', '480p', '360p']:
+                print(f"🔄 Trying quality: {quality}")
+                retry_cmd = url_cmd.copy()
+                retry_cmd[2] = quality
+                retry_result = subprocess.run(retry_cmd, capture_output=True, text=True, timeout=30)
+                if retry_result.returncode == 0 and retry_result.stdout.strip():
+                    url_result = retry_result
+                    break
+            else:
+                print("❌ CRITICAL: All quality options failed - stream may have ended")
+                return None
 
-        except Exception as e:
-            print(f"❌ CRITICAL: Standard clip creation error: {e}")
-            self.is_running = False
-            return False
+        stream_url = url_result.stdout.strip()
+        if not stream_url or not stream_url.startswith('http'):
+            print(f"❌ CRITICAL: Invalid stream URL received: '{stream_url}'")
+            return None
+
+        print(f"✅ Got stream URL: {stream_url[:80]}...")
+        return stream_url
 
     def _capture_continuous_bucket(self, bucket_path: str) -> bool:
         """Capture a continuous video bucket of the full clip duration."""
@@ -1361,103 +1687,22 @@ class StreamProcessor:
             # Ensure bucket directory exists before capture
             os.makedirs(os.path.dirname(bucket_path), exist_ok=True)
 
-            # Cross-platform streamlink availability check
-            streamlink_cmd = 'streamlink'
-            if os.name == 'nt':
-                # Prefer venv Scripts path if available
-                possible = [
-                    os.path.join(os.getcwd(), '.venv', 'Scripts', 'streamlink.exe'),
-                    os.path.join(os.getcwd(), '.venv', 'Scripts', 'streamlink'),
-                    'streamlink'
-                ]
-                for p in possible:
-                    if os.path.isfile(p) or p == 'streamlink':
-                        streamlink_cmd = p
-                        break
-            # Try invoking --version to verify
-            try:
-                ver = subprocess.run([streamlink_cmd, '--version'], capture_output=True, text=True, timeout=10)
-                if ver.returncode != 0:
-                    raise RuntimeError(ver.stderr or 'unknown error')
-            except Exception as e:
-                print(f"❌ CRITICAL: streamlink not available ({e}); attempting pip install")
-                pip_exe = sys.executable
-                install_result = subprocess.run([pip_exe, '-m', 'pip', 'install', 'streamlink'], capture_output=True, text=True, timeout=120)
-                if install_result.returncode != 0:
-                    print(f"❌ CRITICAL: Failed to install streamlink: {install_result.stderr[:200]}")
-                    return False
-                streamlink_cmd = 'streamlink'
-                print("✅ streamlink installed successfully")
-
-            # Extract channel name from URL for Ad Gatekeeper
-            channel_name = None
-            if 'twitch.tv/' in self.config['url']:
-                try:
-                    # Extract channel from URLs like https://www.twitch.tv/papaplatte
-                    channel_name = self.config['url'].split('twitch.tv/')[-1].split('/')[0].split('?')[0]
-                except:
-                    pass
-
-            stream_url = None
-
-            # Use Ad Gatekeeper if available and we have a channel name
-            if self.ad_gatekeeper and channel_name:
-                print(f"🛡️ Using Ad Gatekeeper for bucket: {channel_name}")
-                stream_url = self.ad_gatekeeper.get_clean_twitch_url(channel_name, quality='best')
-
-                if stream_url:
-                    print(f"✅ Got clean stream URL for bucket: {stream_url[:80]}...")
-                else:
-                    print("❌ CRITICAL: Ad Gatekeeper failed to get clean URL for bucket")
-                    return False
-            else:
-                # Fallback to direct streamlink (legacy behavior)
-                print(f"⚠️ Ad Gatekeeper not available, using direct streamlink for bucket")
-                url_cmd = [
-                    streamlink_cmd,
-                    self.config['url'],
-                    'best',  # Use best quality for high-definition clips
-                    '--stream-url',
-                    '--retry-streams', '3',
-                    '--retry-max', '5'
-                ]
-
-                print(f"🔄 Getting stream URL for bucket: streamlink {self.config['url']} best --stream-url")
-                url_result = subprocess.run(url_cmd, capture_output=True, text=True, timeout=30)
-
-                if url_result.returncode != 0:
-                    print(f"❌ CRITICAL: streamlink failed for bucket with return code {url_result.returncode}")
-                    print(f"❌ stdout: {url_result.stdout}")
-                    print(f"❌ stderr: {url_result.stderr}")
-                    # Try with different quality options
-                    for quality in ['720p', '1080p', '480p', '360p']:
-                        print(f"🔄 Trying quality: {quality}")
-                        retry_cmd = url_cmd.copy()
-                        retry_cmd[2] = quality
-                        retry_result = subprocess.run(retry_cmd, capture_output=True, text=True, timeout=30)
-                        if retry_result.returncode == 0 and retry_result.stdout.strip():
-                            url_result = retry_result
-                            break
-                    else:
-                        print("❌ CRITICAL: All quality options failed - stream may have ended")
-                        return False
-
-                stream_url = url_result.stdout.strip()
-                if not stream_url or not stream_url.startswith('http'):
-                    print(f"❌ CRITICAL: Invalid stream URL for bucket: '{stream_url}'")
-                    return False
+            stream_url = self._get_stream_url()
+            if not stream_url:
+                return False
 
-                print(f"✅ Got stream URL for bucket: {stream_url[:80]}...")
+            # Keep the persistent analyzer attached to the live stream
+            self.live_analyzer.ensure_running(stream_url)
 
             # Use FFmpeg to capture continuous video bucket for full clip duration
+            # The HLS source is already H.264/AAC, so the bucket is a stream copy.
+            # Copy output starts at the first keyframe, and each bucket is saved
+            # as a clip on its own, so no re-encode is needed for alignment.
             ffmpeg_cmd = [
                 'ffmpeg',
                 '-i', stream_url,
                 '-t', str(self.clip_length),  # Record for full clip duration
-                '-c:v', 'libx264',  # Re-encode video for compatibility
-                '-c:a', 'aac',      # Re-encode audio for compatibility
-                '-preset', 'fast',  # Balanced encoding speed/quality
-                '-crf', '18',       # High quality (lower CRF = better quality)
+                '-c', 'copy',       # No decode/encode
                 '-avoid_negative_ts', 'make_zero',
                 '-movflags', '+faststart',  # Optimize for streaming/web playback
                 '-f', 'mp4',        # Force MP4 format
@@ -1465,19 +1710,15 @@ class StreamProcessor:
                 bucket_path
             ]
 
-            print(f"🪣 Recording {self.clip_length}s bucket...")
+            logger.debug("🪣 Recording %ss bucket...", self.clip_length)
             self.stream_bucket.is_recording_bucket = True
-            ffmpeg_result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=self.clip_length + 15)
+            ffmpeg_result = _run_ffmpeg_streaming(ffmpeg_cmd, timeout=self.clip_length + 15)
             self.stream_bucket.is_recording_bucket = False
 
-            # Give the file system a moment to finish writing and ensure file integrity
-            import time
-            time.sleep(3)  # Increased wait time for better file completion
-
             if ffmpeg_result.returncode == 0 and os.path.exists(bucket_path):
                 file_size = os.path.getsize(bucket_path)
                 if file_size > 100000:  # Bucket should be much larger than segments
-                    print(f"✅ SUCCESS: Recorded {file_size} byte bucket ({self.clip_length}s)")
+                    logger.debug("✅ SUCCESS: Recorded %d byte bucket (%ss)", file_size, self.clip_length)
                     return True
                 else:
                     print(f"❌ CRITICAL: Bucket file too small ({file_size} bytes)")
@@ -1485,134 +1726,19 @@ class StreamProcessor:
                     return False
             else:
                 print(f"❌ CRITICAL: FFmpeg bucket capture failed")
+                self._invalidate_stream_url()  # Expired/ended URL: resolve again next time
                 print(f"❌ FFmpeg stdout: {ffmpeg_result.stdout}")
                 print(f"❌ FFmpeg stderr: {ffmpeg_result.stderr}")
                 return False
 
         except subprocess.TimeoutExpired:
             print("❌ CRITICAL: Bucket capture timed out")
+            self._invalidate_stream_url()
             self.stream_bucket.is_recording_bucket = False
             return False
         except Exception as e:
             print(f"❌ CRITICAL: Bucket capture error: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-    def _capture_real_segment(self, segment_path: str) -> bool:
-        """Capture a real video segment using Ad Gatekeeper filtered Streamlink - NO FALLBACKS."""
-        try:
-            # Check if streamlink is installed
-            streamlink_check = subprocess.run(['which', 'streamlink'], capture_output=True, text=True)
-            if streamlink_check.returncode != 0:
-                print("❌ CRITICAL: streamlink not found. Attempting to install...")
-                install_result = subprocess.run(['pip', 'install', 'streamlink'], capture_output=True, text=True)
-                if install_result.returncode != 0:
-                    print(f"❌ CRITICAL: Failed to install streamlink: {install_result.stderr}")
-                    return False
-                print("✅ streamlink installed successfully")
-
-            # Extract channel name from URL for Ad Gatekeeper
-            channel_name = None
-            if 'twitch.tv/' in self.config['url']:
-                try:
-                    # Extract channel from URLs like https://www.twitch.tv/papaplatte
-                    channel_name = self.config['url'].split('twitch.tv/')[-1].split('/')[0].split('?')[0]
-                except:
-                    pass
-
-            stream_url = None
-
-            # Use Ad Gatekeeper if available and we have a channel name
-            if self.ad_gatekeeper and channel_name:
-                print(f"🛡️ Using Ad Gatekeeper for channel: {channel_name}")
-                stream_url = self.ad_gatekeeper.get_clean_twitch_url(channel_name, quality='best')
-
-                if stream_url:
-                    print(f"✅ Got clean stream URL via Ad Gatekeeper: {stream_url[:80]}...")
-                else:
-                    print("❌ CRITICAL: Ad Gatekeeper failed to get clean URL")
-                    return False
-            else:
-                # Fallback to direct streamlink (legacy behavior)
-                print(f"⚠️ Ad Gatekeeper not available, using direct streamlink")
-                url_cmd = [
-                    'streamlink',
-                    self.config['url'],
-                    'best',  # Use best quality for high-definition clips
-                    '--stream-url',
-                    '--retry-streams', '3',
-                    '--retry-max', '5'
-                ]
-
-                print(f"🔄 Getting stream URL: streamlink {self.config['url']} best --stream-url")
-                url_result = subprocess.run(url_cmd, capture_output=True, text=True, timeout=30)
-
-                if url_result.returncode != 0:
-                    print(f"❌ CRITICAL: streamlink failed with return code {url_result.returncode}")
-                    print(f"❌ stdout: {url_result.stdout}")
-                    print(f"❌ stderr: {url_result.stderr}")
-
-                    # Try with different quality options (prioritize higher quality)
-                    for quality in ['720p', '1080p', '480p', '360p']:
-                        print(f"🔄 Trying quality: {quality}")
-                        retry_cmd = url_cmd.copy()
-                        retry_cmd[2] = quality
-                        retry_result = subprocess.run(retry_cmd, capture_output=True, text=True, timeout=30)
-                        if retry_result.returncode == 0 and retry_result.stdout.strip():
-                            url_result = retry_result
-                            break
-                    else:
-                        print("❌ CRITICAL: All quality options failed - stream may have ended")
-                        return False
-
-                stream_url = url_result.stdout.strip()
-                if not stream_url or not stream_url.startswith('http'):
-                    print(f"❌ CRITICAL: Invalid stream URL received: '{stream_url}'")
-                    return False
-
-                print(f"✅ Got stream URL: {stream_url[:80]}...")
-
-            # Use FFmpeg to capture a 2-second segment directly from HLS
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-i', stream_url,
-                '-t', '2',  # 2 seconds
-                '-c:v', 'libx264',  # Re-encode video for compatibility
-                '-c:a', 'aac',      # Re-encode audio for compatibility
-                '-preset', 'fast',  # Balanced encoding speed/quality
-                '-crf', '18',       # High quality (lower CRF = better quality)
-                '-avoid_negative_ts', 'make_zero',
-                '-f', 'mp4',        # Force MP4 format
-                '-y',               # Overwrite output
-                segment_path
-            ]
-
-            print(f"🎥 Capturing video segment...")
-            ffmpeg_result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=30)
-
-            if ffmpeg_result.returncode == 0 and os.path.exists(segment_path):
-                file_size = os.path.getsize(segment_path)
-                if file_size > 10000:  # Lowered threshold to 10KB
-                    print(f"✅ SUCCESS: Captured {file_size} byte video segment")
-                    return True
-                else:
-                    print(f"❌ CRITICAL: Video segment too small ({file_size} bytes)")
-                    print(f"❌ FFmpeg stderr: {ffmpeg_result.stderr}")
-                    return False
-            else:
-                print(f"❌ CRITICAL: FFmpeg capture failed")
-                print(f"❌ FFmpeg stdout: {ffmpeg_result.stdout}")
-                print(f"❌ FFmpeg stderr: {ffmpeg_result.stderr}")
-                return False
-
-        except subprocess.TimeoutExpired:
-            print("❌ CRITICAL: Stream capture timed out")
-            return False
-        except Exception as e:
-            print(f"❌ CRITICAL: Stream capture error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.debug("Bucket capture error", exc_info=True)
             return False
 
     def _notify_clip_created(self, filename: str, trigger_reason: str, detection_time: float, file_size: int = None):
@@ -1626,35 +1752,17 @@ class StreamProcessor:
                 'triggerReason': trigger_reason,
             }
 
-            headers = {
-                'Content-Type': 'application/json',
-                'X-Session-Token': self.session_token
-            }
-
-            # Send to session-based API endpoint
-            response = requests.post(
+            # Send to session-based API endpoint. The thumbnail was already
+            # written next to the clip, so no follow-up request is needed.
+            response = self._http.post(
                 f'{BASE_API_URL}/api/sessions/{self.session_id}/clips',
-                json=clip_data,
+                data=_json_body(clip_data),
+                headers={'Content-Type': 'application/json'},
                 timeout=5
             )
 
             if response.status_code == 200:
-                print(f"Successfully notified server about clip: {filename}")
-
-                # Trigger thumbnail generation by making a request to the thumbnail endpoint
-                try:
-                    print(f"Triggering thumbnail generation for: {filename}")
-                    thumbnail_response = requests.get(
-                        f'{BASE_API_URL}/api/thumbnails/{filename}',
-                        headers=headers,
-                        timeout=15
-                    )
-                    if thumbnail_response.status_code == 200:
-                        print(f"✅ Thumbnail generated successfully for: {filename}")
-                    else:
-                        print(f"⚠️ Thumbnail generation failed with status: {thumbnail_response.status_code}")
-                except Exception as thumb_error:
-                    print(f"⚠️ Error triggering thumbnail generation: {thumb_error}")
+                logger.debug("Notified server about clip: %s", filename)
             else:
                 print(f"Failed to notify server: {response.status_code}")
 
@@ -1678,15 +1786,15 @@ class StreamProcessor:
             }
 
             # Send to main server API
-            response = requests.post(
+            response = self._http.post(
                 f'{BASE_API_URL}/api/internal/stream-ended',
-                json=stream_end_data,
+                data=_json_body(stream_end_data),
                 headers=headers,
                 timeout=5
             )
 
             if response.status_code == 200:
-                print(f"✅ Successfully notified server about stream end")
+                logger.debug("Notified server about stream end")
             else:
                 print(f"⚠️ Failed to notify server about stream end: {response.status_code}")
 
@@ -1695,21 +1803,18 @@ class StreamProcessor:
 
     def _metrics_update_loop(self):
         """Send periodic metrics updates via SSE."""
+        deadline = time.monotonic()
+        failing = False  # Report a persistent loop error once, not every tick
         while self.is_running:
             try:
                 # Calculate uptime
                 uptime = time.time() - self.start_time if self.start_time else 0
-                hours = int(uptime // 3600)
-                minutes = int((uptime % 3600) // 60)
-                seconds = int(uptime % 60)
-                uptime_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+                minutes, seconds = divmod(int(uptime), 60)
+                hours, minutes = divmod(minutes, 60)
+                uptime_str = "%02d:%02d:%02d" % (hours, minutes, seconds)
 
-                # Try to get latest analysis metrics
-                latest_metrics = {}
-                try:
-                    latest_metrics = self.metrics_queue.get_nowait()
-                except Empty:
-                    pass # No new metrics available
+                # Latest analysis metrics (empty until the first bucket is analyzed)
+                latest_metrics = self._latest_metrics
 
                 status_data = {
                     'isProcessing': True,
@@ -1729,25 +1834,60 @@ class StreamProcessor:
                     'detectionMode': latest_metrics.get('detection_mode', 'unknown'),
                 }
 
-                # Send to main server for SSE broadcast
-                headers = {
-                    'Content-Type': 'application/json',
-                    'X-Session-Token': self.session_token
-                }
-                response = requests.post(
-                    f'{BASE_API_URL}/api/internal/metrics',
-                    json=status_data,
-                    headers=headers,
-                    timeout=2
-                )
-                
-                if response.status_code != 200:
-                    print(f"❌ Failed to send metrics: {response.status_code}")
+                # Send to main server for SSE broadcast without waiting on the
+                # round trip. While a POST is still in flight this tick's
+                # snapshot is dropped; the next tick carries newer values anyway.
+                pool = self._metrics_pool
+                if (pool and (self._metrics_post is None or self._metrics_post.done())
+                        and time.monotonic() >= self._metrics_retry_at):
+                    self._metrics_post = pool.submit(self._post_metrics, status_data)
+                failing = False
 
             except Exception as e:
-                print(f"Error updating metrics: {e}")
+                if not failing:
+                    print(f"Error updating metrics: {e}")
+                failing = True
+
+            # Update metrics every second, on fixed ticks rather than 1s after the POST
+            deadline += 1.0
+            sleep_for = deadline - time.monotonic()
+            if sleep_for > 0:
+                self._stop_event.wait(sleep_for)
+            else:
+                deadline = time.monotonic()
 
-            time.sleep(1) # Update metrics every second
+    def _post_metrics(self, status_data: Dict[str, Any]):
+        """POST one metrics snapshot to the server (runs on the metrics pool)."""
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Session-Token': self.session_token
+        }
+        try:
+            response = self._http.post(
+                f'{BASE_API_URL}/api/internal/metrics',
+                data=_json_body(status_data),
+                headers=headers,
+                timeout=2
+            )
+            error = None if response.status_code == 200 else f"❌ Failed to send metrics: {response.status_code}"
+        except Exception as e:
+            error = f"Error updating metrics: {e}"
+
+        if error is None:
+            if self._metrics_failures >= 3:
+                print("✅ Metrics delivery recovered")
+            self._metrics_failures = 0
+            self._metrics_retry_at = 0.0
+            return
+
+        # Back off exponentially (1s, 2s, 4s ... capped at 30s) while the server
+        # is failing, and stop repeating the same error after the third attempt
+        self._metrics_failures += 1
+        self._metrics_retry_at = time.monotonic() + min(30.0, 2.0 ** (self._metrics_failures - 1))
+        if self._metrics_failures < 3:
+            print(error)
+        elif self._metrics_failures == 3:
+            print(f"{error} (backing off; further failures muted until recovery)")
 
     def send_metrics_to_backend(self, metrics):
         """Send metrics to the backend API with session context"""
@@ -1756,9 +1896,9 @@ class StreamProcessor:
                 'Content-Type': 'application/json',
                 'X-Session-Token': self.session_token
             }
-            response = requests.post(
+            response = self._http.post(
                 f'{BASE_API_URL}/api/internal/metrics', 
-                json=metrics,
+                data=_json_body(metrics),
                 headers=headers
             )
             if response.status_code != 200:
@@ -1790,8 +1930,10 @@ def main():
             config.get('sessionToken') # Pass session_token if provided
         ):
             try:
-                while processor.is_running:
-                    time.sleep(1)
+                # Set by stop_processing or any path that clears is_running. The
+                # timeout keeps the wait interruptible by Ctrl+C on Windows
+                while not processor._stop_event.wait(timeout=1):
+                    pass
             except KeyboardInterrupt:
                 print("Received interrupt signal")
             finally:
@@ -5,8 +5,11 @@ Unit tests for the Ad Gatekeeper module.
 Tests ad detection logic with sample playlists.
 """
 
+import logging
 import unittest
+from unittest import mock
 from ad_gatekeeper import AdGatekeeper
+from backend.logging_utils import DedupFilter
 
 class TestAdGatekeeper(unittest.TestCase):
     """Test cases for Ad Gatekeeper functionality."""
@@ -144,6 +147,67 @@ index-0001234567894-QrSt.ts
 """
         self.assertFalse(self.gatekeeper.has_ads(real_clean_playlist))
 
+    def test_bytes_playlist(self):
+        """Test that raw playlist bytes are scanned without decoding."""
+        clean = b"#EXTM3U\n#EXT-X-VERSION:6\n#EXTINF:2.000,\nsegment001.ts\n"
+        ad = b"#EXTM3U\n#EXT-X-VERSION:6\n#EXTINF:30.000,\nTwitch-Stitched-Ad-segment.ts\n"
+        self.assertFalse(self.gatekeeper.has_ads(clean))
+        self.assertTrue(self.gatekeeper.has_ads(ad))
+        self.assertTrue(self.gatekeeper.has_ads(b""))
+
+    def test_conditional_get_reuses_cached_body(self):
+        """Test that a 304 response returns the previously fetched playlist."""
+        body = b"#EXTM3U\n#EXTINF:2.000,\nsegment001.ts\n"
+        ok = mock.Mock(status_code=200, content=body, headers={"ETag": '"abc"'})
+        not_modified = mock.Mock(status_code=304, content=b"", headers={})
+        with mock.patch.object(self.gatekeeper._session, "get", side_effect=[ok, not_modified]) as get:
+            first = self.gatekeeper.fetch_playlist_bytes("https://example.com/a.m3u8")
+            second = self.gatekeeper.fetch_playlist_bytes("https://example.com/a.m3u8")
+
+        self.assertIs(first, second)
+        self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": '"abc"'})
+        self.assertFalse(self.gatekeeper.has_ads(second))
+
+    def test_backoff_interval_grows_and_caps(self):
+        """Test that retry waits back off exponentially up to the cap."""
+        gatekeeper = AdGatekeeper(check_interval_sec=2, backoff_multiplier=2, max_interval_sec=10)
+        self.assertEqual(gatekeeper._backoff_interval(1), 2)
+        self.assertEqual(gatekeeper._backoff_interval(2), 4)
+        self.assertEqual(gatekeeper._backoff_interval(3), 8)
+        self.assertEqual(gatekeeper._backoff_interval(4), 10)
+
+    def test_streamlink_url_cached_until_invalidated(self):
+        """Test that resolved stream URLs are reused until invalidated."""
+        with mock.patch.object(self.gatekeeper, "streamlink_url", return_value="https://example.com/a.m3u8") as resolve:
+            self.gatekeeper._cached_streamlink_url("chan")
+            self.gatekeeper._cached_streamlink_url("chan")
+            self.assertEqual(resolve.call_count, 1)
+
+            self.gatekeeper._invalidate_url("chan")
+            self.gatekeeper._cached_streamlink_url("chan")
+            self.assertEqual(resolve.call_count, 2)
+
+    def test_dedup_filter_collapses_repeated_retries(self):
+        """Test that repeated retry warnings are collapsed into one trailer."""
+        dedup = DedupFilter(window_sec=30.0)
+
+        def record(attempt, created):
+            rec = logging.LogRecord("ad_gatekeeper", logging.WARNING, __file__, 0,
+                                    "attempt %d/%d", (attempt, 30), None)
+            rec.created = created
+            return rec
+
+        self.assertTrue(dedup.filter(record(1, 100.0)))
+        self.assertFalse(dedup.filter(record(2, 102.0)))
+        self.assertFalse(dedup.filter(record(3, 105.0)))
+
+        summary = record(4, 131.0)
+        self.assertTrue(dedup.filter(summary))
+        self.assertEqual(summary.suppressed_count, 2)
+        self.assertIn("attempt 4/30", summary.getMessage())
+        self.assertIn("repeated 2×", summary.getMessage())
+
+
 if __name__ == "__main__":
     # Run tests
     unittest.main(verbosity=2)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the live stream analyzer.
+Tests metadata parsing and windowed metrics with canned FFmpeg output.
+"""
+
+import io
+import os
+import time
+import unittest
+from unittest import mock
+from stream_processor import LiveStreamAnalyzer
+
+class TestLiveStreamAnalyzer(unittest.TestCase):
+    """Test cases for LiveStreamAnalyzer parsing and snapshots."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.analyzer = LiveStreamAnalyzer()
+
+    def _add_rms(self, ts, *levels):
+        self.analyzer._rms_samples.extend((ts, level) for level in levels)
+
+    def test_metadata_pipe_parsing(self):
+        """Test that key=value pipe lines become samples, split reads included."""
+        r, w = os.pipe()
+        os.write(w, b"frame:0    pts:0       pts_time:0\n"
+                    b"lavfi.astats.Overall.RMS_level=-23.5\n"
+                    b"frame:1    pts:4800    pts_time:0.1\n"
+                    b"lavfi.astats.Overall.RMS_le")
+        os.write(w, b"vel=-18.25\nlavfi.astats.Overall.RMS_level=nan-ish\n")
+        os.close(w)
+
+        self.analyzer._read_metadata_pipe(r, self.analyzer._rms_samples)
+
+        self.assertEqual([v for _, v in self.analyzer._rms_samples], [-23.5, -18.25])
+
+    def test_stderr_metric_parsing(self):
+        """Test that RMS levels and scene scores are scanned out of stderr."""
+        stderr = (b"[Parsed_ametadata_2 @ 0x1] lavfi.astats.Overall.RMS_level=-30.0\n"
+                  b"[Parsed_metadata_4 @ 0x2] lavfi.scene_score=0.42\n"
+                  b"[Parsed_ametadata_2 @ 0x1] lavfi.astats.Overall.RMS_level=-12.5\n"
+                  b"[Parsed_metadata_4 @ 0x2] lavfi.scene_score=0.07")  # No newline: incomplete
+        process = mock.Mock(stderr=io.BytesIO(stderr))
+
+        self.analyzer._read_metrics(process)
+
+        self.assertEqual([v for _, v in self.analyzer._rms_samples], [-30.0, -12.5])
+        self.assertEqual([v for _, v in self.analyzer._scene_samples], [0.42])
+
+    def test_snapshot_empty_window(self):
+        """Test that no audio in the window yields no snapshot."""
+        self.assertIsNone(self.analyzer.snapshot(window_sec=30))
+
+        self._add_rms(time.monotonic() - 60, -20.0)
+        self.assertIsNone(self.analyzer.snapshot(window_sec=30))
+
+    def test_snapshot_peak_above_baseline(self):
+        """Test that audio_db_change is the window peak over the older mean."""
+        now = time.monotonic()
+        self._add_rms(now - 100, -30.0, -26.0)           # Baseline mean -28 dB
+        self._add_rms(now - 5, -27.0, -16.0, -25.0)      # Window peak -16 dB
+        self.analyzer._scene_samples.extend([(now - 100, 0.9), (now - 5, 0.3), (now - 1, 0.2)])
+
+        metrics = self.analyzer.snapshot(window_sec=30)
+
+        self.assertAlmostEqual(metrics['audio_db_change'], 12.0)
+        self.assertAlmostEqual(metrics['audio_level'], (-25.0 + 60) * 1.67)  # Latest chunk
+        self.assertAlmostEqual(metrics['scene_change'], 0.3)
+        self.assertAlmostEqual(metrics['motion_level'], 30.0)
+
+    def test_snapshot_steady_level_and_silence(self):
+        """Test that a steady level and silent (-inf) chunks are not spikes."""
+        now = time.monotonic()
+        self._add_rms(now - 100, -20.0, float('-inf'))
+        self._add_rms(now - 5, -20.0, float('-inf'))
+
+        metrics = self.analyzer.snapshot(window_sec=30)
+
+        self.assertEqual(metrics['audio_db_change'], 0)
+        self.assertEqual(metrics['audio_level'], 0)
+
+    def test_snapshot_without_history_uses_window_mean(self):
+        """Test that the window is its own baseline until older samples exist."""
+        self._add_rms(time.monotonic(), -30.0, -20.0)
+
+        metrics = self.analyzer.snapshot(window_sec=30)
+
+        self.assertAlmostEqual(metrics['audio_db_change'], 5.0)
+
+    def test_stalled_analyzer_is_disabled(self):
+        """Test that an analyzer without samples past the timeout is marked broken."""
+        analyzer = LiveStreamAnalyzer(no_data_timeout=10)
+        analyzer._started_at = time.monotonic() - 5
+        self.assertFalse(analyzer.check_stalled())
+
+        analyzer._started_at = time.monotonic() - 11
+        self.assertTrue(analyzer.check_stalled())
+        self.assertTrue(analyzer.broken)
+        self.assertFalse(analyzer.ensure_running("https://example.com/a.m3u8"))
+
+    def test_analyzer_with_samples_is_not_stalled(self):
+        """Test that received samples keep the analyzer healthy."""
+        analyzer = LiveStreamAnalyzer(no_data_timeout=10)
+        analyzer._started_at = time.monotonic() - 60
+        analyzer._rms_samples.append((time.monotonic(), -20.0))
+
+        self.assertFalse(analyzer.check_stalled())
+        self.assertFalse(analyzer.broken)
+
+if __name__ == "__main__":
+    # Run tests
+    unittest.main(verbosity=2)